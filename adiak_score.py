@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_adiak_grade():
     print("\n--- ADIAK Fənni üzrə Qiymətləndirmə (Düzəldilmiş) ---")
     
@@ -36,4 +39,12 @@ def calculate_adiak_from_components(presentation, participation, midterm_raw, fi
     midterm_contribution = midterm_raw * 0.20
     pre_exam_total = presentation * 0.15 + participation * 0.2 + midterm_contribution
     final_contribution = final_raw * 0.45
-    return pre_exam_total + final_contribution
\ No newline at end of file
+    return pre_exam_total + final_contribution
+
+
+def calculate_adiak_batch(presentation, participation, midterm_raw, final_raw):
+    """
+    ADIAK ballarını NumPy massivləri üzərində hesablayır (CSV importu üçün)
+    """
+    columns = (presentation, participation, midterm_raw, final_raw)
+    return calculate_adiak_from_components(*(np.asarray(c, dtype=float) for c in columns))
@@ -1,23 +1,85 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import (
+    Flask, render_template, request, redirect, url_for, session, flash, jsonify, stream_with_context, abort,
+)
 from flask_sqlalchemy import SQLAlchemy
 from functools import wraps
+from jinja2 import FileSystemBytecodeCache
+import click
 import csv
+import hashlib
 import io
+import json
+import math
+import os
 import re
-from adiak_score import calculate_adiak_from_components
-from english_score import calculate_english_from_components
-from ict_score import calculate_ict_from_components
-from history_score import calculate_history_from_components
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from markupsafe import Markup
+from batch_scoring import COMPONENT_FIELDS, score_columns
+from simulate import simulate_quotas
+from metrics import metrics
+from group_commit import GroupCommitter
+from leaderboard import Leaderboard
+from search import (
+    SEARCH_BACKFILL_SQL, SEARCH_TABLE, SEARCH_TABLE_DDL, SEARCH_TRIGGERS, az_fold, match_expression, search_name, search_tokens,
+)
+from export import CSV_MIMETYPE, XLSX_MIMETYPE, iter_csv, iter_xlsx, xlsx_available
+
+try:
+    import fcntl
+except ImportError:  # Windows - importlar yalnız proses daxilində ardıcıl olur
+    fcntl = None
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///students.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "your-secret-key-change-in-production"
+app.config["CSV_IMPORT_CHUNK_SIZE"] = 1000
+app.config["CSV_IMPORT_BACKGROUND"] = True  # CSV importu fon işçisində aparılır
+app.config["IMPORT_WORKERS"] = 2
+app.config["RANKING_ENGINE"] = "python"  # "python" və ya "sql"
+app.config["PAGE_SIZE"] = 50
+app.config["MAX_PAGE_SIZE"] = 500
+app.config["SNAPSHOT_RETENTION"] = 20  # hər ixtisas üzrə saxlanılan nəticə snapshot-larının sayı
+app.config["ACTIVE_TERM"] = "default"  # aktiv semestr/axın, məs. "2025-payız"
+app.config["SLOW_REQUEST_LOG_MS"] = None  # məs. 500 - bundan yavaş sorğular SQL ilə loglanır
+# create_app() parametrləri: şablonların bayt-kod keşi (boş - söndürülür; standart instance/jinja_cache),
+# bazanın yaradılması/miqrasiyası və işçi açılarkən keşlərin qızdırılması
+app.config["JINJA_BYTECODE_CACHE_DIR"] = None
+app.config["INIT_SCHEMA"] = True
+app.config["WARMUP_TEMPLATES"] = True
+app.config["WARMUP_RESULTS"] = False
+# Tək tələbə yazılarının qrup commit-i: gözləmə pəncərəsi (ms) və bir qrupdakı maksimum yazı
+app.config["WRITE_COALESCE"] = True
+app.config["WRITE_COALESCE_MS"] = 5
+app.config["WRITE_COALESCE_MAX_BATCH"] = 32
+# FLASK_ prefiksli mühit dəyişənləri yuxarıdakıları əvəz edir (məs. FLASK_SQLALCHEMY_DATABASE_URI)
+app.config.from_prefixed_env()
 db = SQLAlchemy(app)
+metrics.init_app(app)
 
 # Admin username
 ADMIN_USERNAME = "Root@Sudo;Verba"
 
+# CSV importunda saxlanılan xəta mesajlarının maksimum sayı
+IMPORT_ERROR_LIMIT = 50
+
+# Fon import işləri import_job cədvəlindədir (yalnız son IMPORT_JOBS_KEPT iş saxlanılır)
+IMPORT_JOBS_KEPT = 100
+_import_executor_lock = threading.Lock()
+_import_executor = None
+# fcntl olmayan platformalarda import_lock()-un proses daxilindəki əvəzi
+_import_thread_lock = threading.Lock()
+
+# Əlavə/redaktə/silmə yazılarını qruplaşdıran yazıçı (ilk istifadədə yaradılır)
+_write_coalescer = None
+_write_coalescer_lock = threading.Lock()
+
 # Ixtisas qrupları
 qrup_1_RI = [250104, 250108, 250107, 250103, 250110]  # English, ADIAK, ICT
 qrup_1_RK = [250101, 250102]  # English, History, ICT
@@ -36,8 +98,109 @@ IXTISAS_PLANS = {
     250111: {"name": "BM", "free": 20, "payable": 30}
 }
 
+# Nəticə keşi: (ixtisas -> cari snapshot, {"summary" və ya ("api", ixtisas): hazır nəticə})
+_results_cache = (None, {})
+RESULTS_CACHE_MAX_ENTRIES = 256
+
+# İxtisas cədvəllərinin render olunmuş HTML fraqmentləri. Açar sətirləri verən
+# ixtisas snapshot-unun id-sidir, ona görə başqa ixtisasın dəyişməsi bu
+# fraqmenti köhnəltmir və fraqment həmişə öz snapshot-una uyğundur:
+# (snapshot id, kursor, səhifə ölçüsü, tək ixtisas rejimi) -> HTML
+_fragment_cache = {}
+FRAGMENT_CACHE_MAX_ENTRIES = 512
+
+# "Mənim nəticəm" üçün ixtisas leaderboard-ları: (semestr, ixtisas) -> (snapshot
+# id, Leaderboard). Leaderboard ixtisasın nəşr olunmuş snapshot-undan qurulur;
+# cari snapshot başqadırsa (məs. başqa işçi proses nəşr edib), ilk sorğuda yenidən qurulur.
+_leaderboards = {}
+_leaderboards_lock = threading.Lock()
+
+# Təqaüd növünə görə nəticə sətrinin CSS sinfi
+SCHOLARSHIP_ROW_CLASSES = {
+    "Əlaçı təqaüdü": "scholarship-ela",
+    "Zərbəçi": "scholarship-zerbe",
+    "Adi təqaüd": "scholarship-adi",
+}
+
+
+def active_term():
+    """Sorğuların, sıralamanın və keşlərin aid olduğu aktiv semestr/axın"""
+    return app.config["ACTIVE_TERM"]
+
+
+@app.context_processor
+def inject_active_term():
+    return {"active_term": active_term()}
+
+
+class RosterState(db.Model):
+    """Semestrin tələbə siyahısının versiyası - hər dəyişiklikdə artırılır"""
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(20), unique=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class IxtisasState(db.Model):
+    """İxtisasın semestr daxilində sonuncu dəfə yenidən sıralandığı roster versiyası"""
+    term = db.Column(db.String(20), primary_key=True)
+    ixtisas_id = db.Column(db.Integer, primary_key=True)
+    roster_version = db.Column(db.Integer, nullable=False)
+
+
+class ResultSnapshot(db.Model):
+    """
+    Bir ixtisasın bir hesablamadakı nəticələri. Hər (semestr, ixtisas) üçün
+    yalnız is_current olan oxunur; yalnız yenidən sıralanan ixtisaslar yazılır.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(20))
+    ixtisas_id = db.Column(db.Integer)
+    roster_version = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    is_current = db.Column(db.Boolean, nullable=False, default=False, index=True)
+
+    __table_args__ = (
+        db.Index("ix_result_snapshot_term_current_ixtisas", term, is_current, ixtisas_id),
+    )
+
+
+class ResultSnapshotRow(db.Model):
+    """
+    Snapshot-dakı bir tələbənin yeri, təqaüdü və nəticə səhifəsində göstərilən
+    məlumatları. Oxucular canlı student cədvəlinə qoşulmur, ona görə yarımçıq
+    import və ya redaktə yeni nəşrə qədər nəticələrdə görünmür.
+    """
+    snapshot_id = db.Column(db.Integer, db.ForeignKey("result_snapshot.id", ondelete="CASCADE"), primary_key=True)
+    student_id = db.Column(db.Integer, primary_key=True)
+    ixtisas_id = db.Column(db.Integer, nullable=False)
+    rank = db.Column(db.Integer)
+    scholarship_type = db.Column(db.String(50))
+    average_score = db.Column(db.Float)
+
+    name = db.Column(db.String(100))
+    surname = db.Column(db.String(100))
+    english_point = db.Column(db.Float)
+    adiak_point = db.Column(db.Float)
+    history_point = db.Column(db.Float)
+    ict_point = db.Column(db.Float)
+    english_grade = db.Column(db.String(2))
+    adiak_grade = db.Column(db.String(2))
+    history_grade = db.Column(db.String(2))
+    ict_grade = db.Column(db.String(2))
+    cancelled = db.Column(db.Boolean)
+
+    __table_args__ = (
+        # Nəticə səhifəsi: snapshot daxilində ixtisas üzrə rank sırası
+        db.Index("ix_snapshot_row_ixtisas_rank", snapshot_id, ixtisas_id, rank),
+        # Təqaüd xülasəsi
+        db.Index("ix_snapshot_row_scholarship", snapshot_id, scholarship_type, average_score),
+    )
+
+
 class Student(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    # (term) indeksi SQLite-da (term, id) kimidir - /students keyset səhifələri üçün
+    term = db.Column(db.String(20), nullable=False, default=active_term, index=True)
     ixtisas_id = db.Column(db.Integer, nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     surname = db.Column(db.String(100), nullable=False)
@@ -57,6 +220,21 @@ class Student(db.Model):
     ict_grade = db.Column(db.String(2))
     cancelled = db.Column(db.Boolean, default=False)
 
+    # Upsert importu üçün: normallaşdırılmış (ixtisas, ad, soyad) və sətir məzmununun həşləri
+    row_key = db.Column(db.String(40))
+    row_hash = db.Column(db.String(40))
+    # Axtarış üçün Python-da kiçildilmiş "ad soyad" (search_name); triggerlər onu FTS-ə köçürür
+    search_name = db.Column(db.String(201))
+
+    __table_args__ = (
+        # Sıralama: semestr və ixtisas daxilində orta bala görə
+        db.Index("ix_student_term_ixtisas_average", term, ixtisas_id, average_score.desc()),
+        # Təqaüd xülasəsi: semestr daxilində scholarship_type üzrə, orta bala görə
+        db.Index("ix_student_term_scholarship_average", term, scholarship_type, average_score),
+        # Upsert importu: semestr daxilində açar üzrə axtarış
+        db.Index("ix_student_term_row_key", term, row_key),
+    )
+
     def __init__(self, ixtisas_id, name, surname, english_point, adiak_point, ict_point, history_point=0):
         self.ixtisas_id = int(ixtisas_id)
         self.name = name
@@ -167,65 +345,1244 @@ class Student(db.Model):
         }
 
 
-def assign_scholarships():
-    """Tələbələri ixtisas_id-yə görə qruplaşdırır, sıralayır və təqaüd verir"""
-    # Bütün tələbələri ixtisas_id-yə görə qruplaşdır
-    students_by_ixtisas = {}
-    all_students = Student.query.all()
-    for student in all_students:
-        ixtisas_id = student.ixtisas_id
-        if ixtisas_id not in students_by_ixtisas:
-            students_by_ixtisas[ixtisas_id] = []
-        students_by_ixtisas[ixtisas_id].append(student)
-    
-    # Hər ixtisas üçün tələbələri orta bala görə sırala (yüksəkdən aşağıya)
-    for ixtisas_id, ixtisas_students in students_by_ixtisas.items():
-        ixtisas_students.sort(key=lambda s: s.average_score, reverse=True)
-        
+class StudentComponents(db.Model):
+    """
+    Tələbənin daxil edilmiş xam komponentləri (forma və ya CSV). Düsturlar
+    dəyişəndə ballar bunlardan yenidən hesablanır (recompute-scores).
+    """
+    student_id = db.Column(db.Integer, db.ForeignKey("student.id", ondelete="CASCADE"), primary_key=True)
+
+    eng_assessment = db.Column(db.Float, nullable=False, default=0)
+    eng_writing = db.Column(db.Float, nullable=False, default=0)
+    eng_p1 = db.Column(db.Float, nullable=False, default=0)
+    eng_p2 = db.Column(db.Float, nullable=False, default=0)
+    eng_p3 = db.Column(db.Float, nullable=False, default=0)
+    eng_participation = db.Column(db.Float, nullable=False, default=0)
+    eng_midterm = db.Column(db.Float, nullable=False, default=0)
+
+    ict_quiz = db.Column(db.Float, nullable=False, default=0)
+    ict_lab = db.Column(db.Float, nullable=False, default=0)
+    ict_presentation = db.Column(db.Float, nullable=False, default=0)
+    ict_exam = db.Column(db.Float, nullable=False, default=0)
+
+    adiak_presentation = db.Column(db.Float, nullable=False, default=0)
+    adiak_participation = db.Column(db.Float, nullable=False, default=0)
+    adiak_midterm = db.Column(db.Float, nullable=False, default=0)
+    adiak_final = db.Column(db.Float, nullable=False, default=0)
+
+    history_seminar = db.Column(db.Float, nullable=False, default=0)
+    history_interactive = db.Column(db.Float, nullable=False, default=0)
+    history_presentation = db.Column(db.Float, nullable=False, default=0)
+    history_midterm = db.Column(db.Float, nullable=False, default=0)
+    history_final = db.Column(db.Float, nullable=False, default=0)
+
+
+class ImportJob(db.Model):
+    """
+    CSV import işi və gedişatı. Bazada saxlanılır ki, işi hansı işçi proses
+    icra edirsə etsin, /jobs/<id> istənilən prosesdən eyni vəziyyəti görsün.
+    """
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(255))
+    mode = db.Column(db.String(10), nullable=False, default="append")
+    status = db.Column(db.String(10), nullable=False, default="queued")
+    parsed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    chunks = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=False, default="[]")  # JSON siyahı
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "mode": self.mode,
+            "status": self.status,
+            "parsed": self.parsed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "errors": json.loads(self.errors),
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def form_components():
+    """Formadan bütün komponentlər (boş və ya olmayan sahələr 0)"""
+    return {field: request.form.get(field, default=0, type=float) for field in COMPONENT_FIELDS}
+
+
+def component_points(ixtisas_id, components):
+    """Bir tələbənin fənn balları - importdakı score_columns-un tək sətirlik çağırışı"""
+    scores = score_columns(
+        [ixtisas_id], {field: [value] for field, value in components.items()}, qrup_1_RI, qrup_1_RK + qrup_2
+    )
+    return {key: float(scores[key][0]) for key in ("english_point", "adiak_point", "ict_point", "history_point")}
+
+
+def normalize_key_part(value):
+    """Açar üçün ad/soyad: artıq boşluqlar atılır, axtarışdakı az_fold() ilə kiçildilir"""
+    return " ".join(az_fold(value).split())
+
+
+def row_key_for(ixtisas_id, name, surname):
+    """Tələbənin import açarı - semestr daxilində (ixtisas, ad, soyad)"""
+    raw = "\x1f".join([str(ixtisas_id), normalize_key_part(name), normalize_key_part(surname)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def row_hash_for(ixtisas_id, name, surname, values):
+    """Sətir məzmununun həşi (ad, soyad və COMPONENT_FIELDS sırası ilə komponentlər)"""
+    raw = "\x1f".join([str(ixtisas_id), name.strip(), surname.strip(), *(repr(float(v)) for v in values)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def set_row_identity(student, components):
+    """Forma ilə yazılan tələbəyə upsert açarını, məzmun həşini və axtarış adını verir"""
+    student.row_key = row_key_for(student.ixtisas_id, student.name, student.surname)
+    student.search_name = search_name(student.name, student.surname)
+    student.row_hash = row_hash_for(
+        student.ixtisas_id, student.name, student.surname, [components[field] for field in COMPONENT_FIELDS]
+    )
+
+
+def save_components(student_id, components):
+    """Tələbənin komponentlərini yazır (varsa əvəz edir)"""
+    db.session.merge(StudentComponents(student_id=student_id, **components))
+
+
+def english_grade_sql(score):
+    """Student._grade_english-in SQL CASE variantı (sərhədlər və aralıqlar eynidir)"""
+    return db.case(
+        (score >= 70, "A"),
+        (db.and_(score >= 60, score <= 69), "B"),
+        (db.and_(score >= 50, score <= 59), "C"),
+        (db.and_(score >= 40, score <= 49), "D"),
+        else_="F",
+    )
+
+
+def other_grade_sql(score):
+    """Student._grade_other-in SQL CASE variantı"""
+    return db.case(
+        (db.and_(score >= 91, score <= 100), "A"),
+        (db.and_(score >= 81, score < 91), "B"),
+        (db.and_(score >= 71, score < 81), "C"),
+        (db.and_(score >= 61, score < 71), "D"),
+        else_="F",
+    )
+
+
+def grade_values_sql():
+    """
+    Hərf qiymətləri və cancelled üçün SQL ifadələri. Hamısı yalnız bal
+    sütunlarından hesablanır (UPDATE eyni ifadədə yeni qiymətləri görmür),
+    qaydalar _calculate_grades_and_status() ilə eynidir.
+    """
+    is_adiak = Student.ixtisas_id.in_(qrup_1_RI)
+    english = english_grade_sql(Student.english_point)
+    ict = other_grade_sql(Student.ict_point)
+    adiak = other_grade_sql(Student.adiak_point)
+    history = other_grade_sql(Student.history_point)
+    failing = ("D", "F")
+    return {
+        "english_grade": english,
+        "ict_grade": ict,
+        "adiak_grade": db.case((is_adiak, adiak), else_=None),
+        "history_grade": db.case((is_adiak, None), else_=history),
+        "cancelled": db.or_(
+            english.in_(failing),
+            ict.in_(failing),
+            db.case((is_adiak, adiak.in_(failing)), else_=history.in_(failing)),
+        ),
+    }
+
+
+def apply_grades_sql(*criteria):
+    """
+    Şərtə uyğun tələbələrin qiymətlərini və cancelled-i tək set-based UPDATE
+    ilə bazada yazır. Sessiyadakı obyektlər yenilənmir (commit onları expire
+    edir). Yenilənən sətirlərin sayını qaytarır.
+    """
+    query = db.update(Student).where(*criteria).values(**grade_values_sql())
+    return db.session.execute(query, execution_options={"synchronize_session": False}).rowcount
+
+
+def scholarship_type_for(student, ixtisas_id, idx, free_slots):
+    """Sıradakı yerinə və qiymətlərinə görə tələbənin təqaüd növünü qaytarır"""
+    # Əgər free slot daxilində deyilsə - təqaüd yoxdur
+    if idx >= free_slots:
+        return None
+    return eligible_scholarship_type(student, ixtisas_id)
+
+
+def eligible_scholarship_type(student, ixtisas_id):
+    """Kvotaya baxmadan, yalnız qiymətlərə görə tələbənin ala biləcəyi təqaüd növü"""
+    # Əgər hər hansı fəndən D və ya F alıbsa - ləğv olunub, təqaüd YOXDUR
+    if student.cancelled:
+        return None
+
+    # Bu tələbənin üç fənn üzrə hərf qiymətlərini götür
+    if ixtisas_id in qrup_1_RI:
+        grades = [student.english_grade, student.adiak_grade, student.ict_grade]
+    else:
+        grades = [student.english_grade, student.history_grade, student.ict_grade]
+
+    # Təhlükəsizlik üçün, yenə də D və ya F varsa, təqaüd vermirik
+    if any(g in ("D", "F") for g in grades):
+        return None
+
+    # Elaci: bütün 3 fənn A-dır
+    if all(g == "A" for g in grades):
+        return "Əlaçı təqaüdü"
+
+    # Zerbeci: 1 və ya 2 A var, qalanları yalnız B və ya C
+    num_a = grades.count("A")
+    if 1 <= num_a <= 2 and all(g in ("A", "B", "C") for g in grades):
+        return "Zərbəçi"
+
+    # Adi təqaüd: heç bir A yoxdur, yalnız B və C
+    if num_a == 0 and all(g in ("B", "C") for g in grades):
+        return "Adi təqaüd"
+    return None
+
+
+# Sıralamanın oxuduğu sütunlar - ORM obyekti və identity map yükü olmadan
+RANKING_COLUMNS = [
+    Student.id, Student.ixtisas_id, Student.average_score, Student.cancelled,
+    Student.english_grade, Student.adiak_grade, Student.history_grade, Student.ict_grade,
+    Student.rank, Student.scholarship_type,
+]
+
+
+def load_ranking_roster(ixtisas_ids=None):
+    """
+    Aktiv semestrin yığcam roster-i: ixtisas_id -> yüngül Row qeydləri (orta
+    bala görə azalan, bərabərlikdə id sırası ilə). Tək, yalnız sütunlu sorğu
+    ilə oxunur (ix_student_term_ixtisas_average indeksi üzrə).
+    """
+    query = db.select(*RANKING_COLUMNS).where(Student.term == active_term())
+    if ixtisas_ids is not None:
+        query = query.where(Student.ixtisas_id.in_(ixtisas_ids))
+    query = query.order_by(Student.ixtisas_id, Student.average_score.desc(), Student.id)
+    roster = {}
+    for row in db.session.execute(query):
+        roster.setdefault(row.ixtisas_id, []).append(row)
+    return roster
+
+
+def assign_scholarships(ixtisas_ids=None):
+    """Tələbələri ixtisas_id-yə görə qruplaşdırır, sıralayır və təqaüd verir.
+
+    ixtisas_ids verilərsə, yalnız həmin ixtisaslar yenidən sıralanır
+    (None - bütün ixtisaslar). Hesablama load_ranking_roster() qeydləri
+    üzərində aparılır; yalnız rank və ya scholarship_type-ı dəyişən sətirlər
+    bir executemany UPDATE ilə yazılır. Dəyişən sətirlərin sayını qaytarır;
+    commit çağıran tərəfindədir (roster_changed).
+    """
+    if ixtisas_ids is not None and not ixtisas_ids:
+        return 0
+
+    updates = []
+    for ixtisas_id, ixtisas_students in load_ranking_roster(ixtisas_ids).items():
         # Plan məlumatlarını al
         plan = IXTISAS_PLANS.get(ixtisas_id, {"free": 0, "payable": 0})
         free_slots = plan["free"]
-        
+
         # İlk free_slots sayda tələbəyə təqaüd ver
         for idx, student in enumerate(ixtisas_students):
-            student.rank = idx + 1
-            # Default: təqaüd yoxdur
-            student.scholarship_type = None
+            rank = idx + 1
+            scholarship_type = scholarship_type_for(student, ixtisas_id, idx, free_slots)
+            if student.rank != rank or student.scholarship_type != scholarship_type:
+                updates.append({"id": student.id, "rank": rank, "scholarship_type": scholarship_type})
+
+    if updates:
+        # Primary key üzrə toplu UPDATE (executemany)
+        db.session.execute(db.update(Student), updates)
+    return len(updates)
+
+
+# SQL ilə sıralama: ROW_NUMBER() + plan kvotaları, tək set-based UPDATE
+RANKING_SQL = """
+UPDATE student
+SET rank = computed.new_rank, scholarship_type = computed.new_type
+FROM (
+    SELECT id, new_rank,
+           CASE
+               WHEN new_rank > free OR cancelled THEN NULL
+               WHEN english_grade = 'A' AND second_grade = 'A' AND ict_grade = 'A' THEN :type_ela
+               WHEN english_grade IN ('A', 'B', 'C') AND second_grade IN ('A', 'B', 'C')
+                    AND ict_grade IN ('A', 'B', 'C')
+                    AND 'A' IN (english_grade, second_grade, ict_grade) THEN :type_zerbe
+               WHEN english_grade IN ('B', 'C') AND second_grade IN ('B', 'C')
+                    AND ict_grade IN ('B', 'C') THEN :type_adi
+           END AS new_type
+    FROM (
+        SELECT s.id,
+               ROW_NUMBER() OVER (PARTITION BY s.ixtisas_id ORDER BY s.average_score DESC, s.id) AS new_rank,
+               COALESCE(plans.free, 0) AS free,
+               s.cancelled,
+               s.english_grade,
+               CASE WHEN s.ixtisas_id IN :ri_ixtisas THEN s.adiak_grade ELSE s.history_grade END AS second_grade,
+               s.ict_grade
+        FROM student s
+        LEFT JOIN ({plans}) AS plans ON plans.ixtisas_id = s.ixtisas_id
+        WHERE s.term = :term {scope}
+    ) AS ranked
+) AS computed
+WHERE computed.id = student.id
+  AND (student.rank IS NOT computed.new_rank OR student.scholarship_type IS NOT computed.new_type)
+"""
+
+
+def assign_scholarships_sql(ixtisas_ids=None):
+    """
+    assign_scholarships-in SQL variantı: rank ROW_NUMBER() OVER (PARTITION BY
+    ixtisas_id ...) ilə, təqaüd növü isə saxlanılan qiymətlərdən və planın
+    free kvotasından hesablanır. Student obyektləri yaradılmır.
+    """
+    if ixtisas_ids is not None and not ixtisas_ids:
+        return 0
 
-            # Əgər free slot daxilində deyilsə - təqaüd yoxdur
-            if idx >= free_slots:
-                continue
+    params = {
+        "term": active_term(),
+        "ri_ixtisas": list(qrup_1_RI),
+        "type_ela": "Əlaçı təqaüdü",
+        "type_zerbe": "Zərbəçi",
+        "type_adi": "Adi təqaüd",
+    }
+    plan_rows = []
+    for i, (plan_ixtisas, plan) in enumerate(IXTISAS_PLANS.items()):
+        plan_rows.append(f"SELECT :plan_id_{i} AS ixtisas_id, :plan_free_{i} AS free")
+        params[f"plan_id_{i}"] = plan_ixtisas
+        params[f"plan_free_{i}"] = plan["free"]
+
+    bindparams = [db.bindparam("ri_ixtisas", expanding=True)]
+    scope = ""
+    if ixtisas_ids is not None:
+        scope = "AND s.ixtisas_id IN :ixtisas_ids"
+        params["ixtisas_ids"] = list(ixtisas_ids)
+        bindparams.append(db.bindparam("ixtisas_ids", expanding=True))
+
+    statement = db.text(
+        RANKING_SQL.format(plans=" UNION ALL ".join(plan_rows), scope=scope)
+    ).bindparams(*bindparams)
+
+    db.session.flush()
+    return db.session.execute(statement, params).rowcount
+
+
+# Sıralama mühərrikləri - app.config["RANKING_ENGINE"] ilə seçilir
+RANKING_ENGINES = {
+    "python": assign_scholarships,
+    "sql": assign_scholarships_sql,
+}
 
-            # Əgər hər hansı fəndən D və ya F alıbsa - ləğv olunub, təqaüd YOXDUR
-            if student.cancelled:
-                continue
 
-            # Bu tələbənin üç fənn üzrə hərf qiymətlərini götür
-            if ixtisas_id in qrup_1_RI:
-                grades = [student.english_grade, student.adiak_grade, student.ict_grade]
-            else:
-                grades = [student.english_grade, student.history_grade, student.ict_grade]
+def rank_students(ixtisas_ids=None):
+    """Konfiqurasiyada seçilmiş mühərriklə təqaüdləri hesablayır"""
+    engine = app.config["RANKING_ENGINE"]
+    start = time.perf_counter()
+    changed = RANKING_ENGINES[engine](ixtisas_ids)
+    metrics.observe_ranking(engine, time.perf_counter() - start)
+    return changed
+
+
+def get_roster_version():
+    """Aktiv semestrin roster versiyasını qaytarır"""
+    version = db.session.execute(
+        db.select(RosterState.version).where(RosterState.term == active_term())
+    ).scalar()
+    return version or 0
+
+
+def roster_changed(ixtisas_ids=None, student_ids=None):
+    """
+    Aktiv semestrin versiyasını artırır və dəyişən ixtisasları yenidən sıralayır.
+    student_ids - dəyişən tələbələr məlumdursa, leaderboard-lar yalnız onlarla yenilənir.
+    """
+    term = active_term()
+    previous_snapshots = get_current_snapshots()
+    updated = db.session.execute(
+        db.update(RosterState).where(RosterState.term == term).values(version=RosterState.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(RosterState(term=term, version=1))
+    rank_students(ixtisas_ids)
+    mark_ixtisas_ranked(ixtisas_ids)
+    published = publish_snapshot(ixtisas_ids)
+    db.session.commit()
+    refresh_leaderboards(previous_snapshots, published, student_ids)
+
+
+def term_ixtisas_ids():
+    """Aktiv semestrin tələbəsi olan və ya əvvəl sıralanmış bütün ixtisaslar"""
+    term = active_term()
+    ixtisas_ids = set(db.session.execute(
+        db.select(Student.ixtisas_id).where(Student.term == term).distinct()
+    ).scalars())
+    ixtisas_ids.update(db.session.execute(
+        db.select(IxtisasState.ixtisas_id).where(IxtisasState.term == term)
+    ).scalars())
+    return ixtisas_ids
+
+
+def mark_ixtisas_ranked(ixtisas_ids=None):
+    """Yenidən sıralanan ixtisaslara cari roster versiyasını yazır (None - hamısı)"""
+    term = active_term()
+    if ixtisas_ids is None:
+        ixtisas_ids = term_ixtisas_ids()
+    if not ixtisas_ids:
+        return
+    version = get_roster_version()
+    in_term = db.and_(IxtisasState.term == term, IxtisasState.ixtisas_id.in_(ixtisas_ids))
+    existing = set(db.session.execute(db.select(IxtisasState.ixtisas_id).where(in_term)).scalars())
+    if existing:
+        db.session.execute(
+            db.update(IxtisasState)
+            .where(IxtisasState.term == term, IxtisasState.ixtisas_id.in_(existing))
+            .values(roster_version=version)
+        )
+    missing = set(ixtisas_ids) - existing
+    if missing:
+        db.session.execute(
+            db.insert(IxtisasState),
+            [{"term": term, "ixtisas_id": ixtisas_id, "roster_version": version} for ixtisas_id in sorted(missing)],
+        )
 
-            # Təhlükəsizlik üçün, yenə də D və ya F varsa, təqaüd vermirik
-            if any(g in ("D", "F") for g in grades):
-                continue
 
-            # Elaci: bütün 3 fənn A-dır
-            if all(g == "A" for g in grades):
-                student.scholarship_type = "Əlaçı təqaüdü"
-                continue
+# Snapshot-a nəşr anındakı halı ilə köçürülən, nəticələrdə göstərilən tələbə sahələri
+SNAPSHOT_STUDENT_COLUMNS = [
+    "name", "surname",
+    "english_point", "adiak_point", "history_point", "ict_point",
+    "english_grade", "adiak_grade", "history_grade", "ict_grade",
+    "cancelled",
+]
+
+
+def publish_snapshot(ixtisas_ids=None):
+    """
+    Yenidən sıralanan ixtisasların cari sıralamasını yeni snapshot-lara
+    köçürür və onları "current" edir (None - semestrin bütün ixtisasları).
+    Digər ixtisasların snapshot-larına toxunulmur, ona görə bir tələbənin
+    redaktəsi yalnız öz ixtisasını köçürür. Eyni tranzaksiyada işləyir,
+    oxucular hər ixtisası ya köhnə, ya da tam yeni halında görür. Hər
+    ixtisasın son SNAPSHOT_RETENTION snapshot-undan köhnələri silinir.
+    Nəticə: ixtisas -> yeni snapshot id-si.
+    """
+    term = active_term()
+    if ixtisas_ids is None:
+        ixtisas_ids = term_ixtisas_ids()
+    if not ixtisas_ids:
+        return {}
+    version = get_roster_version()
+    published = {}
+    for ixtisas_id in sorted(ixtisas_ids):
+        snapshot = ResultSnapshot(term=term, ixtisas_id=ixtisas_id, roster_version=version)
+        db.session.add(snapshot)
+        db.session.flush()
+        published[ixtisas_id] = snapshot.id
+        # (term, ixtisas_id, average_score) indeksi ilə yalnız bu ixtisasın sətirləri
+        db.session.execute(
+            db.insert(ResultSnapshotRow).from_select(
+                ["snapshot_id", "student_id", "ixtisas_id", "rank", "scholarship_type", "average_score",
+                 *SNAPSHOT_STUDENT_COLUMNS],
+                db.select(
+                    db.literal(snapshot.id), Student.id, Student.ixtisas_id,
+                    Student.rank, Student.scholarship_type, Student.average_score,
+                    *(getattr(Student, name) for name in SNAPSHOT_STUDENT_COLUMNS),
+                ).where(Student.term == term, Student.ixtisas_id == ixtisas_id),
+            )
+        )
 
-            # Zerbeci: 1 və ya 2 A var, qalanları yalnız B və ya C
-            num_a = grades.count("A")
-            if 1 <= num_a <= 2 and all(g in ("A", "B", "C") for g in grades):
-                student.scholarship_type = "Zərbəçi"
+    in_partitions = db.and_(ResultSnapshot.term == term, ResultSnapshot.ixtisas_id.in_(published))
+    db.session.execute(
+        db.update(ResultSnapshot).where(in_partitions)
+        .values(is_current=ResultSnapshot.id.in_(published.values()))
+    )
+
+    stale_ids = []
+    for ixtisas_id in published:
+        stale_ids += db.session.execute(
+            db.select(ResultSnapshot.id)
+            .where(ResultSnapshot.term == term, ResultSnapshot.ixtisas_id == ixtisas_id)
+            .order_by(ResultSnapshot.id.desc()).offset(app.config["SNAPSHOT_RETENTION"])
+        ).scalars().all()
+    if stale_ids:
+        db.session.execute(db.delete(ResultSnapshotRow).where(ResultSnapshotRow.snapshot_id.in_(stale_ids)))
+        db.session.execute(db.delete(ResultSnapshot).where(ResultSnapshot.id.in_(stale_ids)))
+    return published
+
+
+# Leaderboard-un snapshot-dan oxuduğu sütunlar (eligible_scholarship_type üçün qiymətlər də)
+LEADERBOARD_COLUMNS = [
+    ResultSnapshotRow.student_id.label("id"), ResultSnapshotRow.ixtisas_id, ResultSnapshotRow.average_score,
+    ResultSnapshotRow.cancelled, ResultSnapshotRow.english_grade, ResultSnapshotRow.adiak_grade,
+    ResultSnapshotRow.history_grade, ResultSnapshotRow.ict_grade,
+]
+
+
+def leaderboard_entry(row):
+    """Leaderboard qeydi: (id, orta bal, kvotaya düşərsə alacağı təqaüd növü)"""
+    return row.id, row.average_score, eligible_scholarship_type(row, row.ixtisas_id)
+
+
+def get_leaderboard(ixtisas_id, snapshot_id):
+    """
+    İxtisasın snapshot_id nəşrinə uyğun leaderboard-u. Keşdəki leaderboard
+    həmin snapshot-dan qurulubsa, olduğu kimi qaytarılır, əks halda snapshot
+    sətirlərindən bir indeksli sorğu ilə yenidən qurulur - yəni həmişə
+    nəticə səhifəsinin göstərdiyi sıralama ilə eynidir, yarımçıq import
+    görünmür. Leaderboard-u _leaderboards_lock altında oxuyun.
+    """
+    key = (active_term(), ixtisas_id)
+    with _leaderboards_lock:
+        cached = _leaderboards.get(key)
+    if cached is not None and cached[0] == snapshot_id:
+        return cached[1]
+    rows = db.session.execute(
+        db.select(*LEADERBOARD_COLUMNS).where(ResultSnapshotRow.snapshot_id == snapshot_id)
+    ).all()
+    board = Leaderboard(leaderboard_entry(row) for row in rows)
+    with _leaderboards_lock:
+        current = _leaderboards.get(key)
+        # Daha yeni nəşrdən qurulmuş leaderboard köhnəsi ilə əvəz olunmur
+        if current is None or current[0] < snapshot_id:
+            _leaderboards[key] = (snapshot_id, board)
+    return board
+
+
+def refresh_leaderboards(previous_snapshots, published, student_ids=None):
+    """
+    Commit-dən sonra bu prosesdəki leaderboard-ları yeni nəşrlərə keçirir.
+    previous_snapshots - nəşrdən əvvəlki cari snapshot-lar, published -
+    ixtisas -> yeni snapshot id. Dəyişən tələbələr məlumdursa və leaderboard
+    əvəz olunan snapshot-dan qurulmuşdusa, yalnız həmin tələbələr yeni
+    snapshot-dan oxunub yerləşdirilir; qalan hallarda (import, təmizləmə,
+    köhnəlmiş leaderboard) leaderboard atılır.
+    """
+    term = active_term()
+    with _leaderboards_lock:
+        cached = {ixtisas_id: entry for (entry_term, ixtisas_id), entry in _leaderboards.items() if entry_term == term}
+    affected = set(published) & set(cached)
+    if not affected:
+        return
+    patchable = {
+        ixtisas_id for ixtisas_id in affected
+        if student_ids is not None and ixtisas_id in previous_snapshots
+        and cached[ixtisas_id][0] == previous_snapshots[ixtisas_id].id
+    }
+    rows = []
+    if patchable:
+        rows = db.session.execute(
+            db.select(*LEADERBOARD_COLUMNS).where(
+                ResultSnapshotRow.snapshot_id.in_([published[ixtisas_id] for ixtisas_id in patchable]),
+                ResultSnapshotRow.student_id.in_(student_ids),
+            )
+        ).all()
+    with _leaderboards_lock:
+        for ixtisas_id in affected:
+            key = (term, ixtisas_id)
+            # Bu arada başqa sorğu yenidən qurubsa, onun snapshot-u özü yoxlanılacaq
+            if _leaderboards.get(key) is not cached[ixtisas_id]:
+                continue
+            if ixtisas_id not in patchable:
+                del _leaderboards[key]
                 continue
+            board = cached[ixtisas_id][1]
+            for student_id in student_ids:
+                board.remove(student_id)
+            for row in rows:
+                if row.ixtisas_id == ixtisas_id:
+                    board.add(*leaderboard_entry(row))
+            _leaderboards[key] = (published[ixtisas_id], board)
+
+
+def student_standing(student_id):
+    """
+    Tələbənin öz ixtisasındakı yeri, free kvotanın kəsim balı və təqaüd növü -
+    roster oxunmadan, leaderboard üzərində O(log n). Hamısı nəşr olunmuş
+    snapshot-dan gəlir. Tələbə aktiv semestrin cari nəticələrində yoxdursa None.
+    """
+    current_ids = db.select(ResultSnapshot.id).where(ResultSnapshot.term == active_term(), ResultSnapshot.is_current)
+    student = db.session.execute(
+        db.select(
+            ResultSnapshotRow.snapshot_id, ResultSnapshotRow.student_id.label("id"), ResultSnapshotRow.ixtisas_id,
+            ResultSnapshotRow.name, ResultSnapshotRow.surname, ResultSnapshotRow.average_score,
+        ).where(ResultSnapshotRow.student_id == student_id, ResultSnapshotRow.snapshot_id.in_(current_ids))
+    ).first()
+    if student is None:
+        return None
+    board = get_leaderboard(student.ixtisas_id, student.snapshot_id)
+    free = IXTISAS_PLANS.get(student.ixtisas_id, {}).get("free", 0)
+    with _leaderboards_lock:
+        rank = board.rank(student.id)
+        eligible_type = board.payload(student.id)
+        student_count = len(board)
+        cutoff = board.score_at(min(free, student_count))
+    if rank is None:
+        return None
+    return {
+        "student_id": student.id,
+        "ixtisas_id": student.ixtisas_id,
+        "ixtisas_name": IXTISAS_PLANS.get(student.ixtisas_id, {}).get("name", "Unknown"),
+        "name": student.name,
+        "surname": student.surname,
+        "average_score": round(student.average_score, 2),
+        "rank": rank,
+        "student_count": student_count,
+        "free": free,
+        "cutoff_average": round(cutoff, 2) if cutoff is not None else None,
+        "scholarship_type": eligible_type if rank <= free else None,
+    }
 
-            # Adi təqaüd: heç bir A yoxdur, yalnız B və C
-            if num_a == 0 and all(g in ("B", "C") for g in grades):
-                student.scholarship_type = "Adi təqaüd"
 
-    db.session.commit()
+def find_student_id(ixtisas_id, name, surname):
+    """Aktiv semestrdə ixtisas, ad və soyada görə tələbə id-si (upsert açarı ilə)"""
+    return db.session.execute(
+        db.select(Student.id)
+        .where(Student.term == active_term(), Student.row_key == row_key_for(ixtisas_id, name, surname))
+        .order_by(Student.id).limit(1)
+    ).scalar()
+
+
+def get_current_snapshots():
+    """Aktiv semestrdə ixtisas -> oxucuların istifadə etdiyi snapshot (id, roster_version)"""
+    rows = db.session.execute(
+        db.select(ResultSnapshot.ixtisas_id, ResultSnapshot.id, ResultSnapshot.roster_version)
+        .where(ResultSnapshot.term == active_term(), ResultSnapshot.is_current)
+        .order_by(ResultSnapshot.ixtisas_id)
+    ).all()
+    return {row.ixtisas_id: row for row in rows}
+
+
+def current_snapshot_ids(snapshots, ixtisas_id=None):
+    """Oxunacaq snapshot id-ləri: bütün ixtisaslar və ya yalnız ixtisas_id"""
+    if ixtisas_id is None:
+        return [snapshot.id for snapshot in snapshots.values()]
+    snapshot = snapshots.get(ixtisas_id)
+    return [snapshot.id] if snapshot else []
+
+
+def results_tag(snapshots, ixtisas_id=None):
+    """
+    Nəticələrin versiya etiketi (ETag, fayl adı): seçilmiş snapshot-ların ən
+    böyük id-si. Hər nəşr bütün köhnələrdən böyük id yaradır, ona görə hər
+    hansı ixtisasın dəyişməsi etiketi də dəyişir.
+    """
+    return max(current_snapshot_ids(snapshots, ixtisas_id), default=0)
+
+
+def compare_snapshots(old_snapshot_id, new_snapshot_id):
+    """
+    İki snapshot arasında rank və ya təqaüd növü dəyişən, həmçinin əlavə
+    olunan/silinən tələbələri qaytarır (yalnız snapshot cədvəlindən oxunur)
+    """
+    def snapshot_rows(snapshot_id, name):
+        return db.select(ResultSnapshotRow).where(ResultSnapshotRow.snapshot_id == snapshot_id).subquery(name)
+
+    old = snapshot_rows(old_snapshot_id, "old")
+    new = snapshot_rows(new_snapshot_id, "new")
+
+    def diff_columns(primary):
+        return (
+            primary.c.student_id.label("student_id"), primary.c.ixtisas_id.label("ixtisas_id"),
+            old.c.rank.label("old_rank"), new.c.rank.label("new_rank"),
+            old.c.scholarship_type.label("old_scholarship_type"),
+            new.c.scholarship_type.label("new_scholarship_type"),
+        )
+
+    # Köhnədə olanlar: dəyişənlər və silinənlər
+    changed_or_removed = (
+        db.select(*diff_columns(old))
+        .select_from(old.outerjoin(new, new.c.student_id == old.c.student_id))
+        .where(db.or_(
+            new.c.student_id.is_(None),
+            old.c.rank.is_distinct_from(new.c.rank),
+            old.c.scholarship_type.is_distinct_from(new.c.scholarship_type),
+        ))
+    )
+    # Yalnız yenidə olanlar: əlavə olunanlar
+    added = (
+        db.select(*diff_columns(new))
+        .select_from(new.outerjoin(old, old.c.student_id == new.c.student_id))
+        .where(old.c.student_id.is_(None))
+    )
+    query = db.union_all(changed_or_removed, added).order_by("ixtisas_id", "student_id")
+    return [row._asdict() for row in db.session.execute(query)]
+
+
+def ensure_roster_state():
+    """Köhnə bazalar və yeni semestr üçün ilkin hesablamanı və snapshot-u bir dəfə aparır"""
+    if get_roster_version() == 0 or (not get_current_snapshots() and count_term_students()):
+        roster_changed()
+
+
+def apply_student_mutations(mutations):
+    """
+    Tək tələbə yazılarını bir tranzaksiyada icra edir. Hər mutasiya öz
+    SAVEPOINT-ində işləyir və (dəyişdirdiyi ixtisaslar, tələbə id-si) qaytarır;
+    xəta verən yalnız özünü geri qaytarır. Uğurlu olanların ixtisasları bir
+    dəfə yenidən sıralanır və hamısı bir commit ilə yazılır.
+    Hər mutasiya üçün nəticə və ya Exception qaytarır.
+    """
+    if db.engine.dialect.name == "sqlite":
+        # pysqlite SAVEPOINT-dən əvvəl özü BEGIN etmir; yazı kilidi də dərhal alınır
+        db.session.execute(db.text("BEGIN IMMEDIATE"))
+    outcomes = []
+    changed_ixtisas = set()
+    changed_students = set()
+    for mutation in mutations:
+        try:
+            with db.session.begin_nested():
+                outcome = mutation()
+        except Exception as e:
+            outcomes.append(e)
+            continue
+        changed, student_id = outcome
+        changed_ixtisas.update(changed)
+        changed_students.add(student_id)
+        outcomes.append(outcome)
+    try:
+        if changed_ixtisas:
+            roster_changed(changed_ixtisas, changed_students)
+        else:
+            db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        raise
+    return outcomes
+
+
+def run_mutation_batch(mutations):
+    with app.app_context():
+        return apply_student_mutations(mutations)
+
+
+def get_write_coalescer():
+    """Qrup commit yazıçısı (ilk istifadədə, yəni işçi prosesdə yaradılır)"""
+    global _write_coalescer
+    with _write_coalescer_lock:
+        if _write_coalescer is None:
+            _write_coalescer = GroupCommitter(
+                run_mutation_batch,
+                max_batch=app.config["WRITE_COALESCE_MAX_BATCH"],
+                max_wait=app.config["WRITE_COALESCE_MS"] / 1000,
+                name="student-writes",
+            )
+    return _write_coalescer
+
+
+def commit_student_mutation(mutation):
+    """
+    Mutasiyanı qrup commit-inə verir və nəticəsini gözləyir; öz xətası
+    burada yenidən atılır. WRITE_COALESCE söndürülübsə, elə burada tək icra olunur.
+    """
+    if not app.config["WRITE_COALESCE"]:
+        outcome, = apply_student_mutations([mutation])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    # Bu sorğunun oxu tranzaksiyası yazıçının commit-ini kilidləməsin
+    db.session.rollback()
+    return get_write_coalescer().submit(mutation).result()
+
+
+# Nəticə şablonlarının göstərdiyi sütunlar (Student.to_dict() ilə eyni sahələr).
+# Rank, təqaüd növü və orta bal cari snapshot-dan oxunur.
+RESULT_COLUMNS = [
+    ResultSnapshotRow.student_id.label("id"),
+    ResultSnapshotRow.ixtisas_id, ResultSnapshotRow.name, ResultSnapshotRow.surname,
+    ResultSnapshotRow.english_point, ResultSnapshotRow.adiak_point,
+    ResultSnapshotRow.history_point, ResultSnapshotRow.ict_point,
+    ResultSnapshotRow.average_score, ResultSnapshotRow.scholarship_type, ResultSnapshotRow.rank,
+    ResultSnapshotRow.english_grade, ResultSnapshotRow.adiak_grade,
+    ResultSnapshotRow.history_grade, ResultSnapshotRow.ict_grade,
+    ResultSnapshotRow.cancelled,
+]
+
+# Tələbələr siyahısının göstərdiyi sütunlar
+STUDENT_LIST_COLUMNS = [
+    Student.id, Student.ixtisas_id, Student.name, Student.surname,
+    Student.english_point, Student.adiak_point, Student.history_point, Student.ict_point,
+    Student.english_grade, Student.adiak_grade, Student.history_grade, Student.ict_grade,
+    Student.average_score, Student.cancelled,
+]
+
+
+def result_dict(row):
+    """RESULT_COLUMNS sətrini Student.to_dict() formasına çevirir"""
+    result = row._asdict()
+    result["average_score"] = round(result["average_score"], 2)
+    result["ixtisas_name"] = IXTISAS_PLANS.get(result["ixtisas_id"], {}).get("name", "Unknown")
+    return result
+
+
+def snapshot_results_query(snapshot_ids):
+    """Snapshot-ların (ixtisas başına bir) sətirləri - yalnız snapshot cədvəlindən, canlı student-ə qoşulmadan"""
+    return db.select(*RESULT_COLUMNS).where(ResultSnapshotRow.snapshot_id.in_(snapshot_ids))
+
+
+def get_page_size():
+    """?per_page parametrini oxuyur (PAGE_SIZE standart, MAX_PAGE_SIZE ilə məhdud)"""
+    per_page = request.args.get('per_page', type=int) or app.config["PAGE_SIZE"]
+    return max(1, min(per_page, app.config["MAX_PAGE_SIZE"]))
+
+
+def fetch_ixtisas_page(snapshot_id, ixtisas_id, after=None, per_page=None):
+    """
+    İxtisasın bir səhifəsini rank sırası ilə qaytarır (keyset pagination,
+    ix_snapshot_row_ixtisas_rank indeksi üzrə). after - əvvəlki səhifənin
+    son rank-ı. Nəticə: (sətirlər, növbəti kursor və ya None).
+    """
+    per_page = per_page or app.config["PAGE_SIZE"]
+    query = snapshot_results_query([snapshot_id]).where(ResultSnapshotRow.ixtisas_id == ixtisas_id)
+    if after is not None:
+        query = query.where(ResultSnapshotRow.rank > after)
+    query = query.order_by(ResultSnapshotRow.rank).limit(per_page + 1)
+    rows = db.session.execute(query).all()
+    next_cursor = rows[per_page - 1].rank if len(rows) > per_page else None
+    return [result_dict(row) for row in rows[:per_page]], next_cursor
+
+
+def count_students_by_ixtisas(snapshot_ids):
+    """Hər ixtisas üzrə tələbə sayı - obyekt yükləmədən, tək GROUP BY ilə"""
+    query = (
+        db.select(ResultSnapshotRow.ixtisas_id, db.func.count())
+        .where(ResultSnapshotRow.snapshot_id.in_(snapshot_ids))
+        .group_by(ResultSnapshotRow.ixtisas_id)
+        .order_by(ResultSnapshotRow.ixtisas_id)
+    )
+    return dict(db.session.execute(query).all())
+
+
+def current_result_pages():
+    """Cari snapshot-lar (ixtisas -> id, roster_version) və onların keşlənmiş səhifələri"""
+    global _results_cache
+    snapshots = get_current_snapshots()
+    cached_snapshots, pages = _results_cache
+    if cached_snapshots != snapshots:
+        pages = {}
+        _results_cache = (snapshots, pages)
+    if len(pages) >= RESULTS_CACHE_MAX_ENTRIES:
+        pages.clear()
+    return snapshots, pages
+
+
+def third_subject_for(ixtisas_id):
+    """İxtisasın 3-cü fənni: (sütun başlığı, bal sahəsi, qiymət sahəsi)"""
+    if ixtisas_id in qrup_1_RI:
+        return "ADIAK", "adiak_point", "adiak_grade"
+    return "Tarix", "history_point", "history_grade"
+
+
+def row_class_for(student):
+    """Nəticə sətrinin CSS sinfi (ləğv olunanlar, təqaüd növü və ya None)"""
+    if student["cancelled"]:
+        return "no-scholarship"
+    return SCHOLARSHIP_ROW_CLASSES.get(student["scholarship_type"])
+
+
+def result_row_view(student, point_field, grade_field):
+    """İxtisas cədvəlinin bir sətri - şablon yalnız hazır dəyərləri yazır"""
+    return {
+        "rank": student["rank"],
+        "name": student["name"],
+        "surname": student["surname"],
+        "english": f"{student['english_point']:.2f} ({student['english_grade']})",
+        "subject": f"{student[point_field]:.2f} ({student[grade_field]})",
+        "ict": f"{student['ict_point']:.2f} ({student['ict_grade']})",
+        "average": f"{student['average_score']:.2f}",
+        "scholarship_type": student["scholarship_type"],
+        "cancelled": student["cancelled"],
+        "row_class": row_class_for(student),
+    }
+
+
+def scholarship_row_view(student):
+    """"Yalnız təqaüd alanlar" cədvəlinin bir sətri"""
+    third_grade = student["adiak_grade"] or student["history_grade"]
+    return {
+        "ixtisas": f"{student['ixtisas_id']} - {student['ixtisas_name']}",
+        "name": student["name"],
+        "surname": student["surname"],
+        "average": f"{student['average_score']:.2f}",
+        "grades": f"{student['english_grade']} / {third_grade} / {student['ict_grade']}",
+        "scholarship_type": student["scholarship_type"],
+        "row_class": row_class_for(student),
+    }
+
+
+def get_results_summary():
+    """
+    Cari snapshot-lar üzrə ixtisas sayları və təqaüd alanların hazır sətirləri.
+    Snapshot-lar üzrə keşlənir. Nəticə: (ixtisas -> snapshot, xülasə).
+    """
+    snapshots, pages = current_result_pages()
+    if "summary" not in pages:
+        snapshot_ids = current_snapshot_ids(snapshots)
+        counts = count_students_by_ixtisas(snapshot_ids)
+        # Yalnız təqaüd alan tələbələr - ix_snapshot_row_scholarship indeksi ilə
+        scholarship_query = export_query(snapshot_ids, scholarship_only=True)
+        pages["summary"] = {
+            "ixtisas_counts": counts,
+            "student_count": sum(counts.values()),
+            "scholarship_rows": [
+                scholarship_row_view(result_dict(row)) for row in db.session.execute(scholarship_query)
+            ],
+        }
+    return snapshots, pages["summary"]
+
+
+def ixtisas_section_view(snapshot_id, ixtisas_id, student_count, after, per_page):
+    """Bir ixtisas cədvəli üçün görünüş modeli: plan, 3-cü fənn başlığı, sətirlər, kursor"""
+    students, next_cursor = fetch_ixtisas_page(snapshot_id, ixtisas_id, after, per_page)
+    subject_label, point_field, grade_field = third_subject_for(ixtisas_id)
+    plan = IXTISAS_PLANS.get(ixtisas_id, {})
+    return {
+        "ixtisas_id": ixtisas_id,
+        "name": plan.get("name", "Unknown"),
+        "free": plan.get("free", 0),
+        "payable": plan.get("payable", 0),
+        "student_count": student_count,
+        "subject_label": subject_label,
+        "rows": [result_row_view(student, point_field, grade_field) for student in students],
+        "next_cursor": next_cursor,
+    }
+
+
+def render_ixtisas_fragment(snapshot_id, ixtisas_id, student_count, after, per_page, single):
+    """
+    İxtisas cədvəlinin HTML fraqmenti. Snapshot sətirləri dəyişmədiyi üçün
+    açar sətirləri verən snapshot-un id-sidir; ixtisas yenidən nəşr
+    olunanda yeni id ilə yenidən qurulur.
+    """
+    key = (snapshot_id, after, per_page, single)
+    html = _fragment_cache.get(key)
+    if html is None:
+        section = ixtisas_section_view(snapshot_id, ixtisas_id, student_count, after, per_page)
+        html = Markup(render_template('ixtisas_results.html', section=section, per_page=per_page, single=single))
+        if len(_fragment_cache) >= FRAGMENT_CACHE_MAX_ENTRIES:
+            _fragment_cache.clear()
+        _fragment_cache[key] = html
+    return html
+
+
+def render_results_page(ixtisas_id=None, after=None, per_page=None):
+    """
+    results.html: ixtisas_id verilməyibsə, hər ixtisasın ilk səhifəsi.
+    Şablon hazır fraqmentləri və sətirləri yalnız yerləşdirir.
+    """
+    per_page = per_page or app.config["PAGE_SIZE"]
+    snapshots, summary = get_results_summary()
+    counts = summary["ixtisas_counts"]
+    single = ixtisas_id is not None
+    selected = [ixtisas_id] if single else list(counts)
+    sections = [
+        render_ixtisas_fragment(snapshots[selected_id].id, selected_id, counts[selected_id],
+                                after if single else None, per_page, single)
+        for selected_id in selected
+        if selected_id in counts
+    ]
+    scholarship_rows = summary["scholarship_rows"]
+    return render_template('results.html',
+                         sections=sections,
+                         scholarship_rows=scholarship_rows,
+                         scholarship_count=len(scholarship_rows),
+                         no_scholarship_count=summary["student_count"] - len(scholarship_rows),
+                         xlsx_export=xlsx_available())
+
+
+def get_api_results(ixtisas_id=None):
+    """
+    /api/results üçün tam sıralama (Student.to_dict() formasında), snapshot-lar
+    üzrə keşlənir. Nəticə: (oxunan snapshot-ların ən yeni roster versiyası, tələbələr).
+    """
+    snapshots, pages = current_result_pages()
+    key = ("api", ixtisas_id)
+    if key not in pages:
+        query = snapshot_results_query(current_snapshot_ids(snapshots, ixtisas_id))
+        query = query.order_by(ResultSnapshotRow.ixtisas_id, ResultSnapshotRow.rank)
+        pages[key] = [result_dict(row) for row in db.session.execute(query)]
+    selected = snapshots.values() if ixtisas_id is None else [snapshots[ixtisas_id]] if ixtisas_id in snapshots else []
+    return max((snapshot.roster_version for snapshot in selected), default=0), pages[key]
+
+
+# İxrac faylının sütunları (export_rows ilə eyni sıra)
+EXPORT_HEADERS = [
+    "İxtisas", "İxtisas adı", "Yer", "Ad", "Soyad",
+    "İngilis bal", "İngilis qiymət", "ADIAK bal", "ADIAK qiymət", "Tarix bal", "Tarix qiymət",
+    "ICT bal", "ICT qiymət", "Orta bal", "Təqaüd növü", "Status",
+]
+# İxrac zamanı kursordan bir dəfəyə oxunan sətir sayı
+EXPORT_YIELD_PER = 1000
+# İxrac növləri: ad -> (vərəq adı, yalnız təqaüd alanlar)
+EXPORT_KINDS = {
+    "results": ("Nəticələr", False),
+    "scholarships": ("Təqaüd alanlar", True),
+}
+
+
+def export_query(snapshot_ids, ixtisas_id=None, scholarship_only=False):
+    """İxrac sorğusu: tam sıralama ixtisas/rank sırası ilə, təqaüdçülər orta bala görə"""
+    query = snapshot_results_query(snapshot_ids)
+    if ixtisas_id is not None:
+        query = query.where(ResultSnapshotRow.ixtisas_id == ixtisas_id)
+    if scholarship_only:
+        return (
+            query.where(ResultSnapshotRow.scholarship_type.is_not(None), ResultSnapshotRow.cancelled.is_not(True))
+            .order_by(ResultSnapshotRow.average_score.desc(), ResultSnapshotRow.ixtisas_id, ResultSnapshotRow.rank)
+        )
+    return query.order_by(ResultSnapshotRow.ixtisas_id, ResultSnapshotRow.rank)
+
+
+def export_rows(query):
+    """Sorğunu server tərəfli kursorla (yield_per) oxuyur və EXPORT_HEADERS sətirləri yield edir"""
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_YIELD_PER))
+    for row in result:
+        yield [
+            row.ixtisas_id, IXTISAS_PLANS.get(row.ixtisas_id, {}).get("name", "Unknown"), row.rank,
+            row.name, row.surname,
+            round(row.english_point, 2), row.english_grade,
+            round(row.adiak_point or 0, 2), row.adiak_grade,
+            round(row.history_point or 0, 2), row.history_grade,
+            round(row.ict_point, 2), row.ict_grade,
+            round(row.average_score, 2), row.scholarship_type or "",
+            "Resit (ləğv olunub)" if row.cancelled else "Normal",
+        ]
+
+
+# student_search FTS5 cədvəli (create_all-a daxil deyil, ensure_search_index yaradır)
+student_search = db.table(SEARCH_TABLE, db.column("rowid"), db.column("full_name"), db.column("term"))
+
+
+def search_index_available():
+    return db.engine.dialect.name == "sqlite"
+
+
+def ensure_search_index():
+    """
+    Ad/soyad axtarışı üçün FTS5 cədvəlini və sinxronizasiya triggerlərini
+    yaradır. Triggerlər yoxdursa və ya SEARCH_TRIGGERS-dən fərqlidirsə (yeni
+    baza, student cədvəli yenidən yaradılıb, köhnə az_fold() triggerləri),
+    indeks sıfırdan qurulur.
+    """
+    if not search_index_available():
+        return
+    with db.engine.begin() as conn:
+        triggers = dict(conn.execute(
+            db.text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'student_search_%'")
+        ).all())
+        if all(" ".join(triggers.get(name, "").split()) == " ".join(ddl.split())
+               for name, ddl in SEARCH_TRIGGERS.items()):
+            return
+        conn.execute(db.text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+        conn.execute(db.text(SEARCH_TABLE_DDL))
+        for name, ddl in SEARCH_TRIGGERS.items():
+            conn.execute(db.text(f"DROP TRIGGER IF EXISTS {name}"))
+            conn.execute(db.text(ddl))
+        conn.execute(db.text(SEARCH_BACKFILL_SQL))
+
+
+def student_search_ids(text):
+    """
+    Aktiv semestrdə adı/soyadı axtarışa uyğun tələbələrin id-ləri üçün sorğu:
+    (select, id sütunu). Azərbaycan hərflərinə uyğun, hərf böyüklüyü nəzərə
+    alınmır. 3+ simvolluq sözlər trigram indeksi ilə tapılır, qısa sözlər
+    tapılanlar arasında yoxlanılır. Sorğu yalnız FTS cədvəlinə baxır ki,
+    səhifə (rowid sırası və LIMIT) indeksin özündən çıxsın.
+    """
+    indexed, short = search_tokens(text)
+    if not search_index_available():
+        query = db.select(Student.id).where(Student.term == active_term())
+        return query.where(*(Student.search_name.contains(token, autoescape=True) for token in indexed + short)), Student.id
+    rowid = student_search.c.rowid
+    query = db.select(rowid).where(student_search.c.term == active_term())
+    if indexed:
+        query = query.where(student_search.c.full_name.match(match_expression(indexed)))
+    for token in short:
+        query = query.where(db.func.instr(student_search.c.full_name, token) > 0)
+    return query, rowid
+
+
+def fetch_student_list_page(after=None, before=None, per_page=None, search=None):
+    """
+    /students üçün aktiv semestrdə id üzrə keyset səhifəsi. after/before - qonşu səhifənin
+    sərhəd id-si, search - ad/soyad axtarışı (student_search_ids).
+    Nəticə: (sətirlər, əvvəlki səhifə kursoru, növbəti səhifə kursoru).
+    """
+    per_page = per_page or app.config["PAGE_SIZE"]
+    query = db.select(*STUDENT_LIST_COLUMNS).where(Student.term == active_term())
+    if search:
+        # Səhifənin id-ləri axtarış indeksindən eyni kursorla seçilir
+        ids, id_column = student_search_ids(search)
+        if before is not None:
+            ids = ids.where(id_column < before).order_by(id_column.desc())
+        else:
+            if after is not None:
+                ids = ids.where(id_column > after)
+            ids = ids.order_by(id_column)
+        query = query.where(Student.id.in_(ids.limit(per_page + 1)))
+    if before is not None:
+        query = query.where(Student.id < before).order_by(Student.id.desc())
+    else:
+        if after is not None:
+            query = query.where(Student.id > after)
+        query = query.order_by(Student.id)
+    rows = db.session.execute(query.limit(per_page + 1)).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before is not None:
+        rows.reverse()
+        prev_cursor = rows[0].id if has_more and rows else None
+        next_cursor = rows[-1].id if rows else None
+    else:
+        prev_cursor = rows[0].id if after is not None and rows else None
+        next_cursor = rows[-1].id if has_more else None
+    return rows, prev_cursor, next_cursor
+
+
+def count_term_students():
+    """Aktiv semestrdəki tələbə sayı"""
+    return db.session.execute(
+        db.select(db.func.count()).select_from(Student).where(Student.term == active_term())
+    ).scalar()
+
+
+def get_term_student_or_404(student_id):
+    """Aktiv semestrin tələbəsi; başqa semestrin tələbəsi üçün də 404"""
+    student = db.session.get(Student, student_id)
+    if student is None or student.term != active_term():
+        abort(404)
+    return student
+
+
+# Semestr sütunundan əvvəlki, term ilə başlamayan indekslər
+LEGACY_INDEXES = ["ix_student_ixtisas_average", "ix_student_scholarship_average", "ix_result_snapshot_term_current"]
+
+
+def migrate_schema():
+    """
+    Mövcud bazaya çatışmayan sütunları və indeksləri əlavə edir (create_all
+    köhnə cədvəllərə toxunmur). Semestrsiz köhnə sətirlər aktiv semestrə düşür.
+    """
+    inspector = db.inspect(db.engine)
+    term_default = "'" + active_term().replace("'", "''") + "'"
+    with db.engine.begin() as conn:
+        for table in (Student.__table__, RosterState.__table__, ResultSnapshot.__table__):
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            if "term" not in columns:
+                not_null = " NOT NULL" if table is Student.__table__ else ""
+                conn.execute(db.text(
+                    f"ALTER TABLE {table.name} ADD COLUMN term VARCHAR(20){not_null} DEFAULT {term_default}"
+                ))
+        snapshot_columns = {column["name"] for column in inspector.get_columns(ResultSnapshot.__tablename__)}
+        if "ixtisas_id" not in snapshot_columns:
+            conn.execute(db.text(f"ALTER TABLE {ResultSnapshot.__tablename__} ADD COLUMN ixtisas_id INTEGER"))
+        # Bütün semestri bir snapshot-da saxlayan köhnə nəşrlər - ensure_roster_state ixtisaslar üzrə yenidən yazır
+        conn.execute(db.text(
+            "DELETE FROM result_snapshot_row WHERE snapshot_id IN "
+            "(SELECT id FROM result_snapshot WHERE ixtisas_id IS NULL)"
+        ))
+        conn.execute(db.text("DELETE FROM result_snapshot WHERE ixtisas_id IS NULL"))
+        # Göstərilən sahələri saxlamayan köhnə snapshot sətirləri də yenidən nəşr olunur
+        row_columns = {column["name"] for column in inspector.get_columns(ResultSnapshotRow.__tablename__)}
+        missing = [column for column in ResultSnapshotRow.__table__.columns
+                   if column.name in SNAPSHOT_STUDENT_COLUMNS and column.name not in row_columns]
+        for column in missing:
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(db.text(f"ALTER TABLE {ResultSnapshotRow.__tablename__} ADD COLUMN {column.name} {column_type}"))
+        if missing:
+            conn.execute(db.text("DELETE FROM result_snapshot_row"))
+            conn.execute(db.text("DELETE FROM result_snapshot"))
+        student_columns = {column["name"] for column in inspector.get_columns(Student.__tablename__)}
+        for name in ("row_key", "row_hash", "search_name"):
+            if name not in student_columns:
+                column_type = Student.__table__.c[name].type.compile(dialect=conn.dialect)
+                conn.execute(db.text(f"ALTER TABLE {Student.__tablename__} ADD COLUMN {name} {column_type}"))
+        for name in LEGACY_INDEXES:
+            conn.execute(db.text(f"DROP INDEX IF EXISTS {name}"))
+    # ixtisas_state yalnız keş versiyalarıdır - köhnə açarla olan cədvəl yenidən yaradılır
+    if "term" not in {column["name"] for column in inspector.get_columns(IxtisasState.__tablename__)}:
+        IxtisasState.__table__.drop(db.engine)
+        IxtisasState.__table__.create(db.engine)
+    for table in (Student.__table__, ResultSnapshot.__table__, ResultSnapshotRow.__table__):
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    backfill_student_keys()
+    ensure_search_index()
+
+
+def backfill_student_keys(batch_size=5000):
+    """
+    Açarı və ya axtarış adı olmayan, həmçinin az_fold()-un ı saxlayan köhnə
+    variantı ilə yazılmış tələbələrə upsert açarını və search_name-i yenidən
+    yazır. row_hash boş qalır, ona görə belə sətir ilk upsert importunda bir
+    dəfə yenilənir.
+    """
+    while True:
+        rows = db.session.execute(
+            db.select(Student.id, Student.ixtisas_id, Student.name, Student.surname)
+            .where(db.or_(
+                Student.row_key.is_(None), Student.search_name.is_(None), Student.search_name.contains("ı"),
+            )).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(db.update(Student), [
+            {
+                "id": row.id,
+                "row_key": row_key_for(row.ixtisas_id, row.name, row.surname),
+                "search_name": search_name(row.name, row.surname),
+            }
+            for row in rows
+        ])
+        db.session.commit()
+
+
+def load_simulation_roster():
+    """
+    Simulyasiya üçün yaddaşda roster snapshot-u: hər ixtisas üzrə orta bala
+    görə sıralanmış (orta_bal, qiymətlərə görə uyğun təqaüd növü) cütləri.
+    Yalnız lazım olan sütunlar oxunur, Student obyektləri yaradılmır.
+    """
+    query = db.select(
+        Student.ixtisas_id, Student.average_score, Student.cancelled,
+        Student.english_grade, Student.adiak_grade, Student.history_grade, Student.ict_grade,
+    ).where(Student.term == active_term()).order_by(Student.ixtisas_id, Student.average_score.desc(), Student.id)
+    roster = {}
+    for row in db.session.execute(query):
+        roster.setdefault(row.ixtisas_id, []).append(
+            (row.average_score, eligible_scholarship_type(row, row.ixtisas_id))
+        )
+    return roster
+
+
+def normalize_quota_configs(configs):
+    """
+    Kvota konfiqurasiyalarını yoxlayır: hər biri {"name", "quotas": {ixtisas_id: free}}.
+    Göstərilməyən ixtisaslar üçün IXTISAS_PLANS-dakı free kvota götürülür.
+    """
+    if not isinstance(configs, list) or not configs:
+        raise ValueError("configs boş olmayan siyahı olmalıdır")
+    normalized = []
+    for index, config in enumerate(configs):
+        quotas = {ixtisas_id: plan["free"] for ixtisas_id, plan in IXTISAS_PLANS.items()}
+        for ixtisas_id, free in (config.get("quotas") or {}).items():
+            if int(free) < 0:
+                raise ValueError(f"Konfiqurasiya {index}: kvota mənfi ola bilməz")
+            quotas[int(ixtisas_id)] = int(free)
+        normalized.append({"name": config.get("name") or f"config-{index + 1}", "quotas": quotas})
+    return normalized
 
 
 def login_required(f):
@@ -285,8 +1642,8 @@ def logout():
 @admin_required
 def index():
     """Ana səhifə - tələbə əlavə etmə formu"""
-    all_students = Student.query.all()
-    return render_template('index.html', ixtisas_plans=IXTISAS_PLANS, students=all_students)
+    student_count = count_term_students()
+    return render_template('index.html', ixtisas_plans=IXTISAS_PLANS, student_count=student_count)
 
 
 @app.route('/add_student', methods=['POST'])
@@ -298,55 +1655,22 @@ def add_student():
         name = request.form.get('name')
         surname = request.form.get('surname')
 
-        # İngilis dili komponentləri
-        eng_assessment = float(request.form.get('eng_assessment'))
-        eng_writing = float(request.form.get('eng_writing'))
-        eng_p1 = float(request.form.get('eng_p1'))
-        eng_p2 = float(request.form.get('eng_p2'))
-        eng_p3 = float(request.form.get('eng_p3'))
-        eng_participation = float(request.form.get('eng_participation'))
-        eng_midterm = float(request.form.get('eng_midterm'))
-        english_point = calculate_english_from_components(
-            eng_assessment, eng_writing, eng_p1, eng_p2, eng_p3, eng_participation, eng_midterm
-        )
+        components = form_components()
+        points = component_points(ixtisas_id, components)
 
-        # İKT komponentləri
-        ict_quiz = float(request.form.get('ict_quiz'))
-        ict_lab = float(request.form.get('ict_lab'))
-        ict_presentation = float(request.form.get('ict_presentation'))
-        ict_exam = float(request.form.get('ict_exam'))
-        ict_point = calculate_ict_from_components(ict_quiz, ict_lab, ict_presentation, ict_exam)
-
-        # İxtisas_id-yə görə 3-cü fənnin komponentləri
-        adiak_point = 0
-        history_point = 0
-
-        if ixtisas_id in qrup_1_RI:
-            adiak_presentation = float(request.form.get('adiak_presentation'))
-            adiak_participation = float(request.form.get('adiak_participation'))
-            adiak_midterm = float(request.form.get('adiak_midterm'))
-            adiak_final = float(request.form.get('adiak_final'))
-            adiak_point = calculate_adiak_from_components(
-                adiak_presentation, adiak_participation, adiak_midterm, adiak_final
-            )
-        elif ixtisas_id in qrup_1_RK or ixtisas_id in qrup_2:
-            history_seminar = float(request.form.get('history_seminar'))
-            history_interactive = float(request.form.get('history_interactive'))
-            history_presentation = float(request.form.get('history_presentation'))
-            history_midterm = float(request.form.get('history_midterm'))
-            history_final = float(request.form.get('history_final'))
-            history_point = calculate_history_from_components(
-                history_seminar,
-                history_interactive,
-                history_presentation,
-                history_midterm,
-                history_final,
-            )
-        
         # Yeni tələbə yarat
-        student = Student(ixtisas_id, name, surname, english_point, adiak_point, ict_point, history_point)
-        db.session.add(student)
-        db.session.commit()
+        def mutation():
+            student = Student(
+                ixtisas_id, name, surname,
+                points["english_point"], points["adiak_point"], points["ict_point"], points["history_point"],
+            )
+            set_row_identity(student, components)
+            db.session.add(student)
+            db.session.flush()
+            save_components(student.id, components)
+            return {ixtisas_id}, student.id
+
+        commit_student_mutation(mutation)
         
         return redirect(url_for('index'))
     except Exception as e:
@@ -356,46 +1680,206 @@ def add_student():
 @app.route('/calculate')
 @login_required
 def calculate():
-    """Təqaüdləri hesabla və nəticələri göstər"""
-    assign_scholarships()
-    
-    # Tələbələri ixtisas_id-yə görə qruplaşdır
-    students_by_ixtisas = {}
-    all_students = Student.query.all()
-    for student in all_students:
-        ixtisas_id = student.ixtisas_id
-        if ixtisas_id not in students_by_ixtisas:
-            students_by_ixtisas[ixtisas_id] = []
-        students_by_ixtisas[ixtisas_id].append(student)
-    
-    # Hər ixtisas üçün tələbələri rank-a görə artan sırada sırala
-    for ixtisas_id in students_by_ixtisas:
-        students_by_ixtisas[ixtisas_id].sort(key=lambda s: s.rank if s.rank is not None else float('inf'))
-    
-    # Yalnız təqaüd alan tələbələri göstər
-    scholarship_students = [s for s in all_students if s.scholarship_type is not None]
-    
-    return render_template('results.html', 
-                         students_by_ixtisas=students_by_ixtisas,
-                         scholarship_students=scholarship_students,
-                         ixtisas_plans=IXTISAS_PLANS,
-                         students=all_students)
+    """Təqaüd nəticələrini göstər (hesablama roster dəyişəndə aparılır)"""
+    ixtisas_id = request.args.get('ixtisas', type=int)
+    after = request.args.get('after', type=int) if ixtisas_id is not None else None
+    return render_results_page(ixtisas_id, after, get_page_size())
+
+
+@app.route('/api/results')
+@login_required
+def api_results():
+    """Nəticələr JSON kimi; ETag oxunan cari snapshot-lardır, dəyişməyibsə 304 qaytarılır"""
+    ixtisas_id = request.args.get('ixtisas_id', type=int)
+    etag = f"snapshot-{results_tag(get_current_snapshots(), ixtisas_id)}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    version, students = get_api_results(ixtisas_id)
+    response = jsonify({"term": active_term(), "roster_version": version,
+                        "ixtisas_id": ixtisas_id, "students": students})
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def requested_student_id():
+    """?student_id= və ya ?ixtisas_id=&name=&surname= ilə seçilən tələbənin id-si"""
+    student_id = request.args.get('student_id', type=int)
+    if student_id is not None:
+        return student_id
+    ixtisas_id = request.args.get('ixtisas_id', type=int)
+    name = request.args.get('name', '').strip()
+    surname = request.args.get('surname', '').strip()
+    if ixtisas_id is None or not name or not surname:
+        raise ValueError('student_id və ya ixtisas_id, name, surname göstərilməlidir')
+    return find_student_id(ixtisas_id, name, surname)
+
+
+@app.route('/api/my_result')
+@login_required
+def api_my_result():
+    """Bir tələbənin yeri, kəsim balı və təqaüdü - nəticə cədvəli render olunmadan"""
+    try:
+        student_id = requested_student_id()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    standing = student_standing(student_id) if student_id is not None else None
+    if standing is None:
+        return jsonify({'error': 'Tələbə tapılmadı'}), 404
+    return jsonify({'term': active_term(), **standing})
+
+
+@app.route('/my_result')
+@login_required
+def my_result():
+    """"Mənim nəticəm" - ixtisas, ad və soyadla tək tələbənin nəticəsi"""
+    standing = None
+    error = None
+    if request.args:
+        try:
+            student_id = requested_student_id()
+        except ValueError:
+            error = 'İxtisas, ad və soyadı daxil edin'
+        else:
+            standing = student_standing(student_id) if student_id is not None else None
+            if standing is None:
+                error = 'Tələbə tapılmadı'
+    return render_template('my_result.html', standing=standing, error=error, ixtisas_plans=IXTISAS_PLANS)
+
+
+@app.route('/export/<kind>')
+@login_required
+def export_results(kind):
+    """
+    Cari snapshot-u CSV (UTF-8 BOM) və ya XLSX kimi axınla göndərir.
+    ?format=csv|xlsx, ?ixtisas_id= ilə bir ixtisas seçilə bilər.
+    """
+    if kind not in EXPORT_KINDS:
+        return jsonify({'error': 'Naməlum ixrac növü'}), 404
+    file_format = request.args.get('format', 'csv')
+    if file_format not in ('csv', 'xlsx'):
+        return jsonify({'error': 'format csv və ya xlsx olmalıdır'}), 400
+    if file_format == 'xlsx' and not xlsx_available():
+        return jsonify({'error': 'XLSX ixracı üçün openpyxl quraşdırılmalıdır'}), 501
+
+    ixtisas_id = request.args.get('ixtisas_id', type=int)
+    sheet_title, scholarship_only = EXPORT_KINDS[kind]
+    # Snapshot-lar sorğu əvvəlində seçilir; axın boyu roster dəyişsə də fayl ardıcıl qalır
+    snapshots = get_current_snapshots()
+    rows = export_rows(export_query(current_snapshot_ids(snapshots, ixtisas_id), ixtisas_id, scholarship_only))
+
+    filename = f"{kind}-s{results_tag(snapshots, ixtisas_id)}"
+    if ixtisas_id is not None:
+        filename += f"-{ixtisas_id}"
+    if file_format == 'csv':
+        body, mimetype = iter_csv(EXPORT_HEADERS, rows), CSV_MIMETYPE
+    else:
+        body, mimetype = iter_xlsx(EXPORT_HEADERS, rows, sheet_title), XLSX_MIMETYPE
+    return app.response_class(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{file_format}"'},
+    )
+
+
+@app.route('/api/snapshots')
+@admin_required
+def api_snapshots():
+    """Aktiv semestrin saxlanılan nəticə snapshot-ları (?ixtisas_id= ilə bir ixtisasın)"""
+    query = (
+        db.select(ResultSnapshot.id, ResultSnapshot.term, ResultSnapshot.ixtisas_id, ResultSnapshot.roster_version,
+                  ResultSnapshot.created_at, ResultSnapshot.is_current)
+        .where(ResultSnapshot.term == active_term())
+        .order_by(ResultSnapshot.id.desc())
+    )
+    ixtisas_id = request.args.get('ixtisas_id', type=int)
+    if ixtisas_id is not None:
+        query = query.where(ResultSnapshot.ixtisas_id == ixtisas_id)
+    snapshots = db.session.execute(query).all()
+    return jsonify([
+        {**row._asdict(), "created_at": row.created_at.isoformat()} for row in snapshots
+    ])
+
+
+@app.route('/api/snapshots/<int:old_id>/compare/<int:new_id>')
+@admin_required
+def api_compare_snapshots(old_id, new_id):
+    """İki hesablama arasında dəyişən tələbələr"""
+    return jsonify(compare_snapshots(old_id, new_id))
+
+
+@app.route('/api/simulate', methods=['POST'])
+@admin_required
+def api_simulate():
+    """Kvota ssenarilərini bazaya yazmadan qiymətləndirir"""
+    payload = request.get_json(silent=True) or {}
+    try:
+        configs = normalize_quota_configs(payload.get('configs'))
+        processes = payload.get('processes')
+        processes = int(processes) if processes else None
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+    results = simulate_quotas(load_simulation_roster(), configs, processes)
+    return jsonify({'roster_version': get_roster_version(), 'results': results})
 
 
 @app.route('/students')
 @admin_required
 def view_students():
-    """Bütün tələbələri göstər"""
-    all_students = Student.query.all()
-    return render_template('students.html', students=all_students, ixtisas_plans=IXTISAS_PLANS)
+    """Tələbələri səhifə-səhifə göstər (id üzrə keyset pagination, ?q= ilə ad/soyad axtarışı)"""
+    per_page = get_page_size()
+    search = request.args.get('q', '').strip()
+    students, prev_cursor, next_cursor = fetch_student_list_page(
+        after=request.args.get('after', type=int),
+        before=request.args.get('before', type=int),
+        per_page=per_page,
+        search=search,
+    )
+    student_count = count_term_students()
+    return render_template('students.html', students=students, student_count=student_count,
+                           prev_cursor=prev_cursor, next_cursor=next_cursor, per_page=per_page,
+                           ixtisas_plans=IXTISAS_PLANS, search=search)
+
+
+@app.route('/api/students/search')
+@admin_required
+def api_search_students():
+    """Ad/soyad axtarışı: ?q=, ?after= kursoru ilə id üzrə səhifələr"""
+    search = request.args.get('q', '').strip()
+    if not search:
+        return jsonify({'error': 'q boş ola bilməz'}), 400
+    students, _, next_cursor = fetch_student_list_page(
+        after=request.args.get('after', type=int),
+        per_page=get_page_size(),
+        search=search,
+    )
+    return jsonify({
+        'term': active_term(),
+        'query': search,
+        'students': [
+            {**row._asdict(), 'ixtisas_name': IXTISAS_PLANS.get(row.ixtisas_id, {}).get('name', 'Unknown')}
+            for row in students
+        ],
+        'next_cursor': next_cursor,
+    })
 
 
 @app.route('/clear', methods=['POST'])
 @admin_required
 def clear_students():
-    """Bütün tələbələri sil"""
-    Student.query.delete()
-    db.session.commit()
+    """Aktiv semestrin bütün tələbələrini sil (digər semestrlərə toxunulmur)"""
+    term = active_term()
+    ixtisas_ids = set(db.session.execute(
+        db.select(Student.ixtisas_id).where(Student.term == term).distinct()
+    ).scalars())
+    term_student_ids = db.select(Student.id).where(Student.term == term)
+    db.session.execute(db.delete(StudentComponents).where(StudentComponents.student_id.in_(term_student_ids)))
+    db.session.execute(db.delete(Student).where(Student.term == term))
+    # Boş ixtisaslar üçün sıralama heç nə etmir, amma fraqmentləri köhnəlir
+    roster_changed(ixtisas_ids)
     return redirect(url_for('index'))
 
 
@@ -403,9 +1887,13 @@ def clear_students():
 @admin_required
 def remove_student(student_id):
     """Tək tələbəni sil"""
-    student = Student.query.get_or_404(student_id)
-    db.session.delete(student)
-    db.session.commit()
+    def mutation():
+        student = get_term_student_or_404(student_id)
+        db.session.execute(db.delete(StudentComponents).where(StudentComponents.student_id == student_id))
+        db.session.delete(student)
+        return {student.ixtisas_id}, student_id
+
+    commit_student_mutation(mutation)
     return redirect(url_for('view_students'))
 
 
@@ -413,7 +1901,7 @@ def remove_student(student_id):
 @admin_required
 def edit_student(student_id):
     """Tələbə redaktə etmə səhifəsi"""
-    student = Student.query.get_or_404(student_id)
+    student = get_term_student_or_404(student_id)
     return render_template('edit_student.html', student=student, ixtisas_plans=IXTISAS_PLANS)
 
 
@@ -422,75 +1910,36 @@ def edit_student(student_id):
 def update_student(student_id):
     """Tələbə məlumatlarını yenilə"""
     try:
-        student = Student.query.get_or_404(student_id)
-        
         ixtisas_id = int(request.form.get('ixtisas_id'))
         name = request.form.get('name')
         surname = request.form.get('surname')
 
-        # İngilis dili komponentləri
-        eng_assessment = float(request.form.get('eng_assessment'))
-        eng_writing = float(request.form.get('eng_writing'))
-        eng_p1 = float(request.form.get('eng_p1'))
-        eng_p2 = float(request.form.get('eng_p2'))
-        eng_p3 = float(request.form.get('eng_p3'))
-        eng_participation = float(request.form.get('eng_participation'))
-        eng_midterm = float(request.form.get('eng_midterm'))
-        english_point = calculate_english_from_components(
-            eng_assessment, eng_writing, eng_p1, eng_p2, eng_p3, eng_participation, eng_midterm
-        )
+        components = form_components()
+        points = component_points(ixtisas_id, components)
 
-        # İKT komponentləri
-        ict_quiz = float(request.form.get('ict_quiz'))
-        ict_lab = float(request.form.get('ict_lab'))
-        ict_presentation = float(request.form.get('ict_presentation'))
-        ict_exam = float(request.form.get('ict_exam'))
-        ict_point = calculate_ict_from_components(ict_quiz, ict_lab, ict_presentation, ict_exam)
-
-        # İxtisas_id-yə görə 3-cü fənnin komponentləri
-        adiak_point = 0
-        history_point = 0
-
-        if ixtisas_id in qrup_1_RI:
-            adiak_presentation = float(request.form.get('adiak_presentation'))
-            adiak_participation = float(request.form.get('adiak_participation'))
-            adiak_midterm = float(request.form.get('adiak_midterm'))
-            adiak_final = float(request.form.get('adiak_final'))
-            adiak_point = calculate_adiak_from_components(
-                adiak_presentation, adiak_participation, adiak_midterm, adiak_final
-            )
-        elif ixtisas_id in qrup_1_RK or ixtisas_id in qrup_2:
-            history_seminar = float(request.form.get('history_seminar'))
-            history_interactive = float(request.form.get('history_interactive'))
-            history_presentation = float(request.form.get('history_presentation'))
-            history_midterm = float(request.form.get('history_midterm'))
-            history_final = float(request.form.get('history_final'))
-            history_point = calculate_history_from_components(
-                history_seminar,
-                history_interactive,
-                history_presentation,
-                history_midterm,
-                history_final,
-            )
-        
-        # Tələbə məlumatlarını yenilə
-        student.ixtisas_id = ixtisas_id
-        student.name = name
-        student.surname = surname
-        student.english_point = english_point
-        student.adiak_point = adiak_point
-        student.history_point = history_point
-        student.ict_point = ict_point
-        
-        # Ortalama və qiymətləri yenidən hesabla
-        student.average_score = student.calculate_average()
-        student._calculate_grades_and_status()
-        
-        # Təqaüd məlumatlarını sıfırla (yenidən hesablanmalıdır)
-        student.scholarship_type = None
-        student.rank = None
-        
-        db.session.commit()
+        def mutation():
+            student = get_term_student_or_404(student_id)
+
+            # Həm köhnə, həm yeni ixtisas yenidən sıralanmalıdır
+            changed_ixtisas = {student.ixtisas_id, ixtisas_id}
+
+            # Tələbə məlumatlarını yenilə
+            student.ixtisas_id = ixtisas_id
+            student.name = name
+            student.surname = surname
+            for key, value in points.items():
+                setattr(student, key, value)
+
+            # Ortalamanı yenidən hesabla, qiymətlər bazada yazılır
+            student.average_score = student.calculate_average()
+            set_row_identity(student, components)
+            db.session.flush()
+            apply_grades_sql(Student.id == student.id)
+            save_components(student.id, components)
+            return changed_ixtisas, student.id
+
+        # Təqaüdlər qrupun sonunda birlikdə yenidən hesablanır
+        commit_student_mutation(mutation)
         
         return redirect(url_for('view_students'))
     except Exception as e:
@@ -540,6 +1989,474 @@ def identify_csv_columns(headers):
     return column_map
 
 
+def get_float_value(row, column_map, field_name, default=0):
+    """CSV sətrindən rəqəm dəyərini təhlükəsiz oxuyur"""
+    if field_name not in column_map:
+        return default
+    col_idx = column_map[field_name]
+    if col_idx >= len(row):
+        return default
+    value = row[col_idx].strip() if row[col_idx] else ''
+    try:
+        return float(value) if value else default
+    except (ValueError, TypeError):
+        return default
+
+
+def parse_csv_row(row, column_map):
+    """Sətirdən (ixtisas_id, ad, soyad, komponentlər) çıxarır, xəta olarsa ValueError atır"""
+    ixtisas_id = int(row[column_map['ixtisas_id']])
+    name = row[column_map['name']].strip()
+    surname = row[column_map['surname']].strip()
+    if not name or not surname:
+        raise ValueError('Ad və ya soyad boşdur')
+    values = [get_float_value(row, column_map, field) for field in COMPONENT_FIELDS]
+    return ixtisas_id, name, surname, values
+
+
+# CSV-də mütləq olmalı sütunlar
+REQUIRED_CSV_FIELDS = ['ixtisas_id', 'name', 'surname']
+# Doğrulama hesabatında ayrıca sayılan naməlum ixtisas id-lərinin maksimum sayı
+VALIDATION_UNKNOWN_IXTISAS_LIMIT = 50
+
+
+def validate_csv_rows(csv_reader, column_map, preview_limit=3):
+    """
+    Faylı bazaya toxunmadan bir keçiddə yoxlayır. Yaddaş faylın ölçüsündən
+    asılı deyil: hər sütun üçün yalnız sayğaclar və min/max/cəm saxlanılır.
+
+    Hər komponent üçün: rəqəm sayı, 0-a düşəcək dəyərlər (boş, rəqəm olmayan,
+    qısa sətir - get_float_value ilə eyni), 0-100 xaricində olanlar, min/max/orta.
+    Sütun statistikası yalnız import olunacaq sətirlərdən toplanır. Sətir xətaları
+    parse_csv_row ilə eyni qaydadır, ilk IMPORT_ERROR_LIMIT-i saxlanılır.
+    """
+    fields = [field for field in COMPONENT_FIELDS if field in column_map]
+    columns = {
+        field: {"numeric": 0, "empty": 0, "invalid": 0, "missing": 0, "out_of_range": 0,
+                "min": None, "max": None, "sum": 0.0}
+        for field in fields
+    }
+    report = {
+        "rows": 0, "valid_rows": 0, "failed_rows": 0, "empty_rows": 0,
+        "missing_required": [field for field in REQUIRED_CSV_FIELDS if field not in column_map],
+        "unmapped_fields": [field for field in COMPONENT_FIELDS if field not in column_map],
+        "ixtisas_counts": {}, "unknown_ixtisas": {}, "unknown_ixtisas_rows": 0,
+        "errors": [],
+    }
+    preview_rows = []
+
+    for row_num, row in enumerate(csv_reader, start=2):
+        if not any(row):
+            report["empty_rows"] += 1
+            continue
+        report["rows"] += 1
+        if len(preview_rows) < preview_limit:
+            preview_rows.append(row)
+
+        try:
+            ixtisas_id = parse_csv_row(row, column_map)[0]
+        except (ValueError, IndexError, KeyError) as e:
+            report["failed_rows"] += 1
+            if len(report["errors"]) < IMPORT_ERROR_LIMIT:
+                report["errors"].append(f'Sətir {row_num}: {str(e)}')
+            continue
+
+        report["valid_rows"] += 1
+        if ixtisas_id in IXTISAS_PLANS:
+            report["ixtisas_counts"][ixtisas_id] = report["ixtisas_counts"].get(ixtisas_id, 0) + 1
+        else:
+            report["unknown_ixtisas_rows"] += 1
+            unknown = report["unknown_ixtisas"]
+            if ixtisas_id in unknown or len(unknown) < VALIDATION_UNKNOWN_IXTISAS_LIMIT:
+                unknown[ixtisas_id] = unknown.get(ixtisas_id, 0) + 1
+
+        for field in fields:
+            stats = columns[field]
+            col_idx = column_map[field]
+            if col_idx >= len(row):
+                stats["missing"] += 1
+                continue
+            value = row[col_idx].strip() if row[col_idx] else ''
+            if not value:
+                stats["empty"] += 1
+                continue
+            try:
+                number = float(value)
+            except ValueError:
+                stats["invalid"] += 1
+                continue
+            stats["numeric"] += 1
+            if not 0 <= number <= 100:  # NaN də buraya düşür
+                stats["out_of_range"] += 1
+            if math.isfinite(number):
+                stats["sum"] += number
+                stats["min"] = number if stats["min"] is None else min(stats["min"], number)
+                stats["max"] = number if stats["max"] is None else max(stats["max"], number)
+
+    report["columns"] = {
+        field: {
+            "type": "number" if not stats["invalid"] else "text",
+            "numeric": stats["numeric"],
+            "defaulted_to_zero": stats["empty"] + stats["invalid"] + stats["missing"],
+            "empty": stats["empty"],
+            "invalid": stats["invalid"],
+            "missing": stats["missing"],
+            "out_of_range": stats["out_of_range"],
+            "min": stats["min"],
+            "max": stats["max"],
+            "mean": round(stats["sum"] / stats["numeric"], 2) if stats["numeric"] else None,
+        }
+        for field, stats in columns.items()
+    }
+    return report, preview_rows
+
+
+# Import zamanı Python-da hesablanan sütunlar; qiymətlər və cancelled bazada yazılır
+IMPORT_SCORE_COLUMNS = ("english_point", "ict_point", "adiak_point", "history_point", "average_score")
+
+
+def chunk_values(components, i):
+    """Hissənin i-ci sətrinin komponentləri COMPONENT_FIELDS sırası ilə"""
+    return [components[field][i] for field in COMPONENT_FIELDS]
+
+
+def take_chunk_rows(chunk, indices):
+    """Hissədən yalnız verilən sətirləri eyni formada çıxarır"""
+    ixtisas_ids, names, surnames, components = chunk
+    return (
+        [ixtisas_ids[i] for i in indices],
+        [names[i] for i in indices],
+        [surnames[i] for i in indices],
+        {field: [values[i] for i in indices] for field, values in components.items()},
+    )
+
+
+def insert_student_chunk(ixtisas_ids, names, surnames, components):
+    """
+    Bir hissənin ballarını vektorlaşdırılmış hesablayır, tək executemany ilə
+    əlavə edir, sonra hərf qiymətlərini bir set-based UPDATE ilə yazır.
+    Xam komponentlər StudentComponents-ə yazılır.
+    """
+    scores = score_columns(ixtisas_ids, components, qrup_1_RI, qrup_1_RK + qrup_2)
+    columns = {key: scores[key].tolist() for key in IMPORT_SCORE_COLUMNS}
+    term = active_term()
+    rows = [
+        {
+            "term": term,
+            "ixtisas_id": ixtisas_ids[i],
+            "name": names[i],
+            "surname": surnames[i],
+            "scholarship_type": None,
+            "rank": None,
+            "row_key": row_key_for(ixtisas_ids[i], names[i], surnames[i]),
+            "row_hash": row_hash_for(ixtisas_ids[i], names[i], surnames[i], chunk_values(components, i)),
+            "search_name": search_name(names[i], surnames[i]),
+            **{key: values[i] for key, values in columns.items()},
+        }
+        for i in range(len(ixtisas_ids))
+    ]
+    student_ids = db.session.execute(
+        db.insert(Student).returning(Student.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    # Yalnız bu hissənin sətirləri - paralel yazılan başqa tələbələrə toxunulmur
+    apply_grades_sql(Student.id.in_(student_ids))
+    db.session.execute(db.insert(StudentComponents), [
+        {"student_id": student_id, **{field: values[i] for field, values in components.items()}}
+        for i, student_id in enumerate(student_ids)
+    ])
+
+
+def update_student_chunk(student_ids, ixtisas_ids, names, surnames, components):
+    """
+    Mövcud tələbələri yerində yeniləyir: ballar vektor hesablanır və PK üzrə
+    executemany UPDATE ilə yazılır, qiymətlər SQL-də, komponentlər əvəz olunur
+    """
+    scores = score_columns(ixtisas_ids, components, qrup_1_RI, qrup_1_RK + qrup_2)
+    columns = {key: scores[key].tolist() for key in IMPORT_SCORE_COLUMNS}
+    db.session.execute(db.update(Student), [
+        {
+            "id": student_id,
+            "name": names[i],
+            "surname": surnames[i],
+            "row_hash": row_hash_for(ixtisas_ids[i], names[i], surnames[i], chunk_values(components, i)),
+            "search_name": search_name(names[i], surnames[i]),
+            **{key: values[i] for key, values in columns.items()},
+        }
+        for i, student_id in enumerate(student_ids)
+    ])
+    apply_grades_sql(Student.id.in_(student_ids))
+    db.session.execute(db.delete(StudentComponents).where(StudentComponents.student_id.in_(student_ids)))
+    db.session.execute(db.insert(StudentComponents), [
+        {"student_id": student_id, **{field: values[i] for field, values in components.items()}}
+        for i, student_id in enumerate(student_ids)
+    ])
+
+
+def upsert_student_chunk(ixtisas_ids, names, surnames, components):
+    """
+    Upsert importunun bir hissəsi. Hər sətrin açarı aktiv semestrdə
+    ix_student_term_row_key ilə axtarılır: tapılmayanlar əlavə olunur,
+    məzmun həşi dəyişənlər yerində yenilənir, eyniləri ötürülür. Hissə
+    daxilində təkrarlanan açarlardan sonuncusu götürülür.
+    Nəticə: (əlavə, yenilənən, ötürülən, dəyişən ixtisaslar).
+    """
+    chunk = (ixtisas_ids, names, surnames, components)
+    keys = [row_key_for(ixtisas_ids[i], names[i], surnames[i]) for i in range(len(ixtisas_ids))]
+    latest = {key: i for i, key in enumerate(keys)}
+
+    # Eyni açarlı köhnə təkrarlar varsa, ən kiçik id-li sətir yenilənir
+    existing = {}
+    query = (
+        db.select(Student.id, Student.row_key, Student.row_hash)
+        .where(Student.term == active_term(), Student.row_key.in_(list(latest)))
+        .order_by(Student.id.desc())
+    )
+    for row in db.session.execute(query):
+        existing[row.row_key] = row
+
+    new_rows = []
+    changed_rows = []
+    for key, i in latest.items():
+        current = existing.get(key)
+        if current is None:
+            new_rows.append(i)
+        elif current.row_hash != row_hash_for(ixtisas_ids[i], names[i], surnames[i], chunk_values(components, i)):
+            changed_rows.append((current.id, i))
+
+    if new_rows:
+        insert_student_chunk(*take_chunk_rows(chunk, new_rows))
+    if changed_rows:
+        update_student_chunk([student_id for student_id, _ in changed_rows],
+                             *take_chunk_rows(chunk, [i for _, i in changed_rows]))
+
+    changed_ixtisas = {ixtisas_ids[i] for i in new_rows} | {ixtisas_ids[i] for _, i in changed_rows}
+    skipped = len(keys) - len(new_rows) - len(changed_rows)
+    return len(new_rows), len(changed_rows), skipped, changed_ixtisas
+
+
+def recompute_scores(batch_size=None):
+    """
+    Aktiv semestrin saxlanılan komponentlərindən bütün balları və orta balı
+    cari düsturlarla, batch_size-lıq hissələrlə (vektor hesablayıcılar +
+    executemany UPDATE) yenidən hesablayır. Sonra qiymətlər SQL-də yazılır və bütün ixtisaslar
+    yenidən sıralanır; hamısı bir tranzaksiyadadır. Statistikanı qaytarır.
+    """
+    batch_size = batch_size or app.config["CSV_IMPORT_CHUNK_SIZE"]
+    term = active_term()
+    component_columns = [getattr(StudentComponents, field) for field in COMPONENT_FIELDS]
+    stats = {"recomputed": 0, "without_components": 0, "batches": 0}
+    after = 0
+    while True:
+        rows = db.session.execute(
+            db.select(StudentComponents.student_id, Student.ixtisas_id, *component_columns)
+            .join(Student, Student.id == StudentComponents.student_id)
+            .where(Student.term == term, StudentComponents.student_id > after)
+            .order_by(StudentComponents.student_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        ixtisas_ids = [row.ixtisas_id for row in rows]
+        components = {field: [getattr(row, field) for row in rows] for field in COMPONENT_FIELDS}
+        scores = score_columns(ixtisas_ids, components, qrup_1_RI, qrup_1_RK + qrup_2)
+        columns = {key: scores[key].tolist() for key in IMPORT_SCORE_COLUMNS}
+        db.session.execute(db.update(Student), [
+            {"id": row.student_id, **{key: values[i] for key, values in columns.items()}}
+            for i, row in enumerate(rows)
+        ])
+        stats["recomputed"] += len(rows)
+        stats["batches"] += 1
+        after = rows[-1].student_id
+
+    apply_grades_sql(Student.term == term)
+    student_count = count_term_students()
+    stats["without_components"] = student_count - stats["recomputed"]
+    roster_changed()
+    return stats
+
+
+def log_import_progress(stats):
+    """Hər hissədən sonra import gedişatını loglayır"""
+    app.logger.info(
+        "CSV import: %d hissə, %d sətir oxundu, %d əlavə edildi, %d xəta",
+        stats["chunks"], stats["parsed"], stats["inserted"], stats["failed"],
+    )
+
+
+def import_csv_rows(csv_reader, column_map, chunk_size=None, progress=log_import_progress, upsert=False):
+    """
+    CSV sətirlərini chunk_size ölçülü hissələrlə oxuyur. Hər hissə bir
+    executemany ilə yazılır və commit olunur, ona görə yaddaş faylın
+    ölçüsündən asılı deyil və gec gələn xəta əvvəlki hissələri pozmur.
+    upsert=True olduqda mövcud tələbələr açarla tapılır (upsert_student_chunk).
+    Sonda yalnız dəyişən ixtisaslar yenidən sıralanır. Statistikanı qaytarır.
+    """
+    chunk_size = chunk_size or app.config["CSV_IMPORT_CHUNK_SIZE"]
+    stats = {"parsed": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "chunks": 0, "errors": []}
+    changed_ixtisas = set()
+
+    def new_chunk():
+        return [], [], [], {field: [] for field in COMPONENT_FIELDS}
+
+    def flush_chunk(chunk):
+        ixtisas_ids = chunk[0]
+        if not ixtisas_ids:
+            return
+        if upsert:
+            inserted, updated, skipped, chunk_ixtisas = upsert_student_chunk(*chunk)
+            stats["updated"] += updated
+            stats["skipped"] += skipped
+        else:
+            insert_student_chunk(*chunk)
+            inserted, chunk_ixtisas = len(ixtisas_ids), set(ixtisas_ids)
+        db.session.commit()
+        changed_ixtisas.update(chunk_ixtisas)
+        stats["inserted"] += inserted
+        stats["chunks"] += 1
+        if progress:
+            progress(stats)
+
+    chunk = new_chunk()
+    try:
+        for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 because header is row 1
+            if not any(row):  # Skip empty rows
+                continue
+
+            stats["parsed"] += 1
+            try:
+                ixtisas_id, name, surname, values = parse_csv_row(row, column_map)
+            except (ValueError, IndexError, KeyError) as e:
+                stats["failed"] += 1
+                if len(stats["errors"]) < IMPORT_ERROR_LIMIT:
+                    stats["errors"].append(f'Sətir {row_num}: {str(e)}')
+                continue
+
+            ixtisas_ids, names, surnames, components = chunk
+            ixtisas_ids.append(ixtisas_id)
+            names.append(name)
+            surnames.append(surname)
+            for field, value in zip(COMPONENT_FIELDS, values):
+                components[field].append(value)
+
+            if len(ixtisas_ids) >= chunk_size:
+                flush_chunk(chunk)
+                chunk = new_chunk()
+
+        flush_chunk(chunk)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # Artıq commit olunmuş hissələr üçün də sıralama yenilənməlidir
+        if changed_ixtisas:
+            roster_changed(changed_ixtisas)
+
+    return stats
+
+
+def save_upload(file):
+    """Yüklənən faylı müvəqqəti fayla yazır və yolunu qaytarır"""
+    fd, path = tempfile.mkstemp(prefix='upload-', suffix='.csv')
+    with os.fdopen(fd, 'wb') as target:
+        file.save(target)
+    return path
+
+
+def get_import_executor():
+    """Import işləri üçün fon thread pool-u (ilk istifadədə yaradılır)"""
+    global _import_executor
+    with _import_executor_lock:
+        if _import_executor is None:
+            _import_executor = ThreadPoolExecutor(
+                max_workers=app.config["IMPORT_WORKERS"], thread_name_prefix="csv-import"
+            )
+    return _import_executor
+
+
+def import_lock_path():
+    """Import kilidi faylı: SQLite bazasının yanında, başqa bazalar üçün instance qovluğunda"""
+    database = db.engine.url.database
+    if db.engine.dialect.name == "sqlite" and database and database != ":memory:":
+        return database + ".import-lock"
+    os.makedirs(app.instance_path, exist_ok=True)
+    return os.path.join(app.instance_path, "import.lock")
+
+
+@contextmanager
+def import_lock():
+    """
+    Eyni bazaya gedən importları və sxemin hazırlanmasını (init_database)
+    bütün işçi proseslər arasında ardıcıl edir (SQLite yazıcısı təkdir). Bazanın yanındakı faylda flock saxlanılır;
+    import bir neçə commit-lə getdiyi üçün tranzaksiya kilidi yetmir. Proses
+    çöksə, kilidi əməliyyat sistemi buraxır.
+    """
+    if fcntl is None:
+        with _import_thread_lock:
+            yield
+        return
+    with open(import_lock_path(), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def update_import_job(job_id, **values):
+    """İşin sətrini yeniləyir və dərhal commit edir ki, digər proseslər görsün"""
+    db.session.execute(db.update(ImportJob).where(ImportJob.id == job_id).values(**values))
+    db.session.commit()
+
+
+def submit_import_job(path, filename, upsert=False):
+    """
+    Import işini import_job cədvəlində qeydə alır və fon işçisinə verir
+    (CSV_IMPORT_BACKGROUND söndürülübsə, elə burada icra edir). İşin
+    dict-ini qaytarır.
+    """
+    job = ImportJob(id=uuid.uuid4().hex, filename=filename, mode="upsert" if upsert else "append")
+    db.session.add(job)
+    db.session.flush()
+    # Yalnız son işlər saxlanılır
+    kept = db.select(ImportJob.id).order_by(ImportJob.created_at.desc()).limit(IMPORT_JOBS_KEPT)
+    db.session.execute(db.delete(ImportJob).where(ImportJob.id.not_in(kept)))
+    db.session.commit()
+    job_id = job.id
+
+    if app.config["CSV_IMPORT_BACKGROUND"]:
+        get_import_executor().submit(run_import_job, job_id, path, upsert)
+        return job.to_dict()
+    run_import_job(job_id, path, upsert)
+    return db.session.get(ImportJob, job_id, populate_existing=True).to_dict()
+
+
+def run_import_job(job_id, path, upsert=False):
+    """Import işini icra edir; eyni baza üçün işlər bütün proseslərdə növbə ilə gedir"""
+    def progress(stats):
+        log_import_progress(stats)
+        update_import_job(
+            job_id, errors=json.dumps(list(stats["errors"]), ensure_ascii=False),
+            **{key: stats[key] for key in ("parsed", "inserted", "updated", "skipped", "failed", "chunks")},
+        )
+
+    with app.app_context():
+        try:
+            with import_lock():
+                update_import_job(job_id, status="running")
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    csv_reader = csv.reader(stream)
+                    column_map = identify_csv_columns(next(csv_reader))
+                    stats = import_csv_rows(csv_reader, column_map, progress=progress, upsert=upsert)
+                progress(stats)
+                update_import_job(job_id, status="done", finished_at=datetime.utcnow())
+        except Exception as e:
+            app.logger.exception("CSV import işi %s uğursuz oldu", job_id)
+            db.session.rollback()
+            update_import_job(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            os.remove(path)
+
+
 @app.route('/upload_csv', methods=['POST'])
 @admin_required
 def upload_csv():
@@ -557,127 +2474,66 @@ def upload_csv():
         flash('Yalnız CSV faylları qəbul olunur', 'error')
         return redirect(url_for('index'))
     
+    upload_path = None
     try:
-        # Read CSV file
-        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig')
-        csv_reader = csv.reader(stream)
-        
-        # Get headers
-        headers = next(csv_reader)
+        # Faylı müvəqqəti yerə yaz - import fon işçisində davam edir
+        upload_path = save_upload(file)
+        with open(upload_path, encoding='utf-8-sig', newline='') as stream:
+            headers = next(csv.reader(stream))
         column_map = identify_csv_columns(headers)
         
         # Check required columns
-        required_fields = ['ixtisas_id', 'name', 'surname']
-        missing_fields = [f for f in required_fields if f not in column_map]
+        missing_fields = [f for f in REQUIRED_CSV_FIELDS if f not in column_map]
         
         if missing_fields:
+            os.remove(upload_path)
             flash(f'CSV-də lazımi sütunlar tapılmadı: {", ".join(missing_fields)}', 'error')
             return redirect(url_for('index'))
         
-        # Process rows
-        added_count = 0
-        error_count = 0
-        errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 because header is row 1
-            if not any(row):  # Skip empty rows
-                continue
-            
-            try:
-                # Extract basic info
-                ixtisas_id = int(row[column_map['ixtisas_id']])
-                name = row[column_map['name']].strip()
-                surname = row[column_map['surname']].strip()
-                
-                if not name or not surname:
-                    error_count += 1
-                    errors.append(f'Sətir {row_num}: Ad və ya soyad boşdur')
-                    continue
-                
-                # Helper function to safely extract float values
-                def get_float_value(field_name, default=0):
-                    if field_name not in column_map:
-                        return default
-                    col_idx = column_map[field_name]
-                    if col_idx >= len(row):
-                        return default
-                    value = row[col_idx].strip() if row[col_idx] else ''
-                    try:
-                        return float(value) if value else default
-                    except (ValueError, TypeError):
-                        return default
-                
-                # Extract English components
-                eng_assessment = get_float_value('eng_assessment')
-                eng_writing = get_float_value('eng_writing')
-                eng_p1 = get_float_value('eng_p1')
-                eng_p2 = get_float_value('eng_p2')
-                eng_p3 = get_float_value('eng_p3')
-                eng_participation = get_float_value('eng_participation')
-                eng_midterm = get_float_value('eng_midterm')
-                
-                english_point = calculate_english_from_components(
-                    eng_assessment, eng_writing, eng_p1, eng_p2, eng_p3, eng_participation, eng_midterm
-                )
-                
-                # Extract ICT components
-                ict_quiz = get_float_value('ict_quiz')
-                ict_lab = get_float_value('ict_lab')
-                ict_presentation = get_float_value('ict_presentation')
-                ict_exam = get_float_value('ict_exam')
-                
-                ict_point = calculate_ict_from_components(ict_quiz, ict_lab, ict_presentation, ict_exam)
-                
-                # Extract ADIAK or History components based on ixtisas_id
-                adiak_point = 0
-                history_point = 0
-                
-                if ixtisas_id in qrup_1_RI:
-                    adiak_presentation = get_float_value('adiak_presentation')
-                    adiak_participation = get_float_value('adiak_participation')
-                    adiak_midterm = get_float_value('adiak_midterm')
-                    adiak_final = get_float_value('adiak_final')
-                    adiak_point = calculate_adiak_from_components(
-                        adiak_presentation, adiak_participation, adiak_midterm, adiak_final
-                    )
-                elif ixtisas_id in qrup_1_RK or ixtisas_id in qrup_2:
-                    history_seminar = get_float_value('history_seminar')
-                    history_interactive = get_float_value('history_interactive')
-                    history_presentation = get_float_value('history_presentation')
-                    history_midterm = get_float_value('history_midterm')
-                    history_final = get_float_value('history_final')
-                    history_point = calculate_history_from_components(
-                        history_seminar, history_interactive, history_presentation, history_midterm, history_final
-                    )
-                
-                # Create student
-                student = Student(ixtisas_id, name, surname, english_point, adiak_point, ict_point, history_point)
-                db.session.add(student)
-                added_count += 1
-                
-            except (ValueError, IndexError, KeyError) as e:
-                error_count += 1
-                errors.append(f'Sətir {row_num}: {str(e)}')
-                continue
+        job = submit_import_job(upload_path, file.filename, upsert=request.form.get('mode') == 'upsert')
+        upload_path = None  # artıq iş faylın sahibidir
         
-        db.session.commit()
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'job_id': job['id'], 'status_url': url_for('job_status', job_id=job['id'])}), 202
         
-        if added_count > 0:
-            flash(f'{added_count} tələbə uğurla əlavə edildi', 'success')
-        if error_count > 0:
-            flash(f'{error_count} sətirdə xəta baş verdi. İlk 5 xəta: {"; ".join(errors[:5])}', 'warning')
+        if job['status'] == 'done':
+            if job["inserted"] > 0:
+                flash(f'{job["inserted"]} tələbə uğurla əlavə edildi ({job["chunks"]} hissə)', 'success')
+            if job["mode"] == "upsert":
+                flash(f'{job["updated"]} tələbə yeniləndi, {job["skipped"]} sətir dəyişməyib', 'success')
+            if job["failed"] > 0:
+                flash(f'{job["failed"]} sətirdə xəta baş verdi. İlk 5 xəta: {"; ".join(job["errors"][:5])}', 'warning')
+        elif job['status'] == 'failed':
+            flash(f'CSV faylını oxumaq mümkün olmadı: {job["error"]}', 'error')
+        else:
+            flash(f'CSV importu başladı (iş {job["id"]}). Gedişat: {url_for("job_status", job_id=job["id"])}', 'success')
         
         return redirect(url_for('index'))
         
     except Exception as e:
+        if upload_path:
+            os.remove(upload_path)
         flash(f'CSV faylını oxumaq mümkün olmadı: {str(e)}', 'error')
         return redirect(url_for('index'))
 
 
+@app.route('/jobs/<job_id>')
+@admin_required
+def job_status(job_id):
+    """Fon import işinin gedişatı: oxunan, əlavə olunan, xətalı sətirlər və ilk xətalar"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'İş tapılmadı'}), 404
+    return jsonify(job.to_dict())
+
+
 @app.route('/preview_csv', methods=['POST'])
 @admin_required
 def preview_csv():
-    """CSV faylının sütunlarını identifikasiya edir və preview göstərir"""
+    """
+    CSV faylının sütunlarını identifikasiya edir və preview göstərir.
+    mode=validate ilə bütün fayl bir keçiddə yoxlanılır (validate_csv_rows).
+    """
     if 'csv_file' not in request.files:
         return jsonify({'error': 'Fayl seçilməyib'}), 400
     
@@ -686,10 +2542,20 @@ def preview_csv():
         return jsonify({'error': 'Fayl seçilməyib'}), 400
     
     try:
-        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig')
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
         csv_reader = csv.reader(stream)
         headers = next(csv_reader)
         column_map = identify_csv_columns(headers)
+
+        if request.values.get('mode') == 'validate':
+            validation, preview_rows = validate_csv_rows(csv_reader, column_map)
+            return jsonify({
+                'headers': headers,
+                'column_map': column_map,
+                'preview': preview_rows,
+                'mapped_fields': list(column_map.keys()),
+                'validation': validation,
+            })
         
         # Get first few rows for preview
         preview_rows = []
@@ -709,7 +2575,124 @@ def preview_csv():
         return jsonify({'error': str(e)}), 400
 
 
-if __name__ == '__main__':
-    with app.app_context():
+def init_database():
+    """
+    Cədvəllər, miqrasiyalar və aktiv semestrin ilkin hesablaması. Eyni anda
+    açılan işçilər (--preload olmadan) sxemi növbə ilə hazırlayır: import_lock()
+    altında sonrakı işçi artıq yaradılmış cədvəlləri görür və heç nə etmir.
+    """
+    with import_lock():
         db.create_all()
-    app.run(debug=True)
+        migrate_schema()
+        ensure_roster_state()
+
+
+def configure_bytecode_cache():
+    """
+    Şablonların kompilyasiya olunmuş bayt-kodunu diskdə saxlayır: yeni işçi
+    templates/ qovluğunu yenidən kompilyasiya etmir, faylı dəyişən şablon
+    isə avtomatik yenilənir
+    """
+    directory = app.config["JINJA_BYTECODE_CACHE_DIR"]
+    if directory is None:
+        directory = os.path.join(app.instance_path, "jinja_cache")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def warm_templates():
+    """Bütün şablonları yükləyir ki, ilk sorğu kompilyasiya gözləməsin"""
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+def warm_results():
+    """Nəticə səhifəsinin və API-nin keşlərini cari snapshot-dan doldurur"""
+    with app.test_request_context("/calculate"):
+        render_results_page()
+        get_api_results()
+
+
+# SQLAlchemy(app) modul yüklənərkən mühərriki bu açarlarla qurur - create_app(config)
+# onları dəyişə bilməz, FLASK_ prefiksli mühit dəyişənləri ilə verilməlidir
+IMPORT_TIME_CONFIG_PREFIXES = ("SQLALCHEMY_",)
+
+
+def create_app(config=None):
+    """
+    WSGI girişi (məs. gunicorn -w 4 --preload "app:create_app()"). Marşrutlar modulun
+    özündə qeydiyyatdadır, ona görə hər çağırış yeni tətbiq yaratmır, modulun
+    tək app obyektini konfiqurasiya edib qaytarır. config-dəki SQLALCHEMY_*
+    açarları (baza ünvanı, mühərrik parametrləri) import zamanı bağlanır və
+    fərqli dəyərlə verilərsə ValueError atılır. Sxem sorğu yolundan kənarda
+    hazırlanır (--preload olmadan hər işçi init_database()-i import_lock()
+    altında növbə ilə çağırır), istəyə görə şablonlar və nəticə keşləri qızdırılır;
+    mərhələlərin müddəti /metrics-də göstərilir. Sonda bağlantı hovuzu
+    boşaldılır ki, --preload ilə fork olunan işçilər açıq SQLite
+    bağlantılarını paylaşmasın.
+    """
+    started = time.perf_counter()
+    config = dict(config or {})
+    fixed = sorted(
+        key for key, value in config.items()
+        if key.startswith(IMPORT_TIME_CONFIG_PREFIXES) and app.config.get(key) != value
+    )
+    if fixed:
+        raise ValueError(
+            f"create_app() bu açarları dəyişə bilməz: {', '.join(fixed)} "
+            f"(FLASK_{fixed[0]} kimi mühit dəyişəni ilə verin)"
+        )
+    app.config.update(config)
+    configure_bytecode_cache()
+    with app.app_context():
+        if app.config["INIT_SCHEMA"]:
+            phase_started = time.perf_counter()
+            init_database()
+            metrics.observe_startup("init_schema", time.perf_counter() - phase_started)
+        if app.config["WARMUP_TEMPLATES"]:
+            phase_started = time.perf_counter()
+            warm_templates()
+            metrics.observe_startup("warm_templates", time.perf_counter() - phase_started)
+        if app.config["WARMUP_RESULTS"]:
+            phase_started = time.perf_counter()
+            warm_results()
+            metrics.observe_startup("warm_results", time.perf_counter() - phase_started)
+        # İşçilər bağlantılarını fork-dan sonra özləri açır
+        db.engine.dispose()
+    metrics.observe_startup("create_app", time.perf_counter() - started)
+    app.logger.info("create_app: %.1f ms", (time.perf_counter() - started) * 1000)
+    return app
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Cədvəlləri yaradır, miqrasiyaları və ilkin hesablamanı aparır"""
+    init_database()
+    click.echo("Baza hazırdır")
+
+
+@app.cli.command('simulate-quotas')
+@click.argument('config_file', type=click.File('r', encoding='utf-8'))
+@click.option('--processes', type=int, default=None, help='Paralel proses sayı')
+def simulate_quotas_command(config_file, processes):
+    """JSON faylındakı kvota konfiqurasiyalarını simulyasiya edir"""
+    configs = normalize_quota_configs(json.load(config_file))
+    results = simulate_quotas(load_simulation_roster(), configs, processes)
+    click.echo(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+@app.cli.command('recompute-scores')
+@click.option('--batch-size', type=int, default=None, help='Bir hissədəki tələbə sayı')
+def recompute_scores_command(batch_size):
+    """Saxlanılan komponentlərdən balları cari düsturlarla yenidən hesablayır"""
+    stats = recompute_scores(batch_size)
+    click.echo(
+        f"{stats['recomputed']} tələbə yenidən hesablandı ({stats['batches']} hissə); "
+        f"komponentləri olmayan: {stats['without_components']}"
+    )
+
+
+if __name__ == '__main__':
+    create_app().run(debug=True)
@@ -0,0 +1,94 @@
+import numpy as np
+
+from adiak_score import calculate_adiak_batch
+from english_score import calculate_english_batch
+from history_score import calculate_history_batch
+from ict_score import calculate_ict_batch
+
+# Fənn komponentlərinin sütun adları (forma və CSV ilə eyni)
+ENGLISH_FIELDS = ['eng_assessment', 'eng_writing', 'eng_p1', 'eng_p2', 'eng_p3', 'eng_participation', 'eng_midterm']
+ICT_FIELDS = ['ict_quiz', 'ict_lab', 'ict_presentation', 'ict_exam']
+ADIAK_FIELDS = ['adiak_presentation', 'adiak_participation', 'adiak_midterm', 'adiak_final']
+HISTORY_FIELDS = ['history_seminar', 'history_interactive', 'history_presentation', 'history_midterm', 'history_final']
+COMPONENT_FIELDS = ENGLISH_FIELDS + ICT_FIELDS + ADIAK_FIELDS + HISTORY_FIELDS
+
+
+def grade_english_batch(scores):
+    """Student._grade_english-in vektor variantı (eyni sərhədlərlə)"""
+    scores = np.asarray(scores, dtype=float)
+    conditions = [
+        scores >= 70,
+        (scores >= 60) & (scores <= 69),
+        (scores >= 50) & (scores <= 59),
+        (scores >= 40) & (scores <= 49),
+    ]
+    return np.select(conditions, ["A", "B", "C", "D"], default="F").astype(object)
+
+
+def grade_other_batch(scores):
+    """Student._grade_other-in vektor variantı (ADIAK, Tarix, ICT)"""
+    scores = np.asarray(scores, dtype=float)
+    conditions = [
+        (scores >= 91) & (scores <= 100),
+        (scores >= 81) & (scores < 91),
+        (scores >= 71) & (scores < 81),
+        (scores >= 61) & (scores < 71),
+    ]
+    return np.select(conditions, ["A", "B", "C", "D"], default="F").astype(object)
+
+
+def score_columns(ixtisas_ids, components, adiak_ixtisas, history_ixtisas):
+    """
+    Bütün sətirlər üçün yekun balları, orta balı, hərf qiymətlərini və
+    ləğv statusunu bir vektor keçidində hesablayır.
+
+    components - komponent adı -> sütun (olmayan komponentlər 0 sayılır).
+    adiak_ixtisas / history_ixtisas - 3-cü fənni ADIAK və ya Tarix olan ixtisaslar.
+    Nəticə Student sütun adları ilə NumPy massivlərinin dict-idir.
+    """
+    ids = np.asarray(ixtisas_ids, dtype=np.int64)
+    size = len(ids)
+
+    def column(field):
+        values = components.get(field)
+        return np.zeros(size) if values is None else np.asarray(values, dtype=float)
+
+    is_adiak = np.isin(ids, list(adiak_ixtisas))
+    is_history = np.isin(ids, list(history_ixtisas))
+
+    english = calculate_english_batch(*(column(f) for f in ENGLISH_FIELDS))
+    ict = calculate_ict_batch(*(column(f) for f in ICT_FIELDS))
+    adiak = np.where(is_adiak, calculate_adiak_batch(*(column(f) for f in ADIAK_FIELDS)), 0.0)
+    history = np.where(is_history, calculate_history_batch(*(column(f) for f in HISTORY_FIELDS)), 0.0)
+
+    average = np.where(
+        is_adiak,
+        (english + adiak + ict) / 3,
+        np.where(is_history, (english + history + ict) / 3, 0.0),
+    )
+
+    english_grade = grade_english_batch(english)
+    ict_grade = grade_other_batch(ict)
+    adiak_grade = np.where(is_adiak, grade_other_batch(adiak), None)
+    history_grade = np.where(is_adiak, None, grade_other_batch(history))
+    third_grade = np.where(is_adiak, adiak_grade, history_grade)
+
+    failing = ["D", "F"]
+    cancelled = (
+        np.isin(english_grade, failing)
+        | np.isin(ict_grade, failing)
+        | np.isin(third_grade, failing)
+    )
+
+    return {
+        "english_point": english,
+        "ict_point": ict,
+        "adiak_point": adiak,
+        "history_point": history,
+        "average_score": average,
+        "english_grade": english_grade,
+        "ict_grade": ict_grade,
+        "adiak_grade": adiak_grade,
+        "history_grade": history_grade,
+        "cancelled": cancelled,
+    }
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+İsti yolların mikro-benchmark-ları.
+
+Sintetik tələbə siyahısı (sample_students.csv sütunları ilə) yaradır, hər
+ölçü üçün ayrıca müvəqqəti SQLite bazasında ölçür və nəticələri JSON kimi
+yazır ki, versiyalar arasında reqressiyalar görünsün:
+
+    python benchmark.py --sizes 1000,100000,1000000 --output benchmark_results.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# app import olunmamışdan əvvəl ayrıca baza seçilməlidir
+_db_dir = tempfile.mkdtemp(prefix="scholarship-bench-")
+os.environ["FLASK_SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+import app as scholarship_app  # noqa: E402
+from adiak_score import calculate_adiak_from_components  # noqa: E402
+from batch_scoring import ADIAK_FIELDS, ENGLISH_FIELDS, HISTORY_FIELDS, ICT_FIELDS, score_columns  # noqa: E402
+from english_score import calculate_english_from_components  # noqa: E402
+from history_score import calculate_history_from_components  # noqa: E402
+from ict_score import calculate_ict_from_components  # noqa: E402
+
+CSV_HEADERS = ["ixtisas_id", "name", "surname"] + ENGLISH_FIELDS + ICT_FIELDS + ADIAK_FIELDS + HISTORY_FIELDS
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+# Student obyektləri ilə ölçülən testlərdə maksimum sətir sayı
+ORM_SAMPLE_LIMIT = 100_000
+
+NAMES = ["Əli", "Ayşə", "Məhəmməd", "Leyla", "Rəşad", "Günay", "Orxan", "Nərmin", "İlkin", "Şəbnəm"]
+SURNAMES = ["Məmmədov", "Həsənova", "Əliyev", "Quliyeva", "İsmayılov", "Şükürova", "Cəfərov", "Əhmədova"]
+
+
+def generate_roster(size, seed=42):
+    """
+    Sintetik siyahı: hər tələbənin ümumi "bacarığı" (orta 75, sapma 10) var,
+    komponentlər onun ətrafında səpələnir və 0-100 aralığında tam ədədə
+    yuvarlaqlaşdırılır. 3-cü fənn ixtisas qrupuna görə doldurulur, digəri 0 olur.
+    """
+    rng = np.random.default_rng(seed)
+    ixtisas_choices = np.array(list(scholarship_app.IXTISAS_PLANS))
+    ixtisas_ids = rng.choice(ixtisas_choices, size=size)
+    ability = rng.normal(75, 10, size=size)
+
+    def component():
+        return np.clip(np.rint(rng.normal(ability, 8)), 0, 100)
+
+    columns = {field: component() for field in ENGLISH_FIELDS + ICT_FIELDS}
+    is_adiak = np.isin(ixtisas_ids, scholarship_app.qrup_1_RI)
+    for field in ADIAK_FIELDS:
+        columns[field] = np.where(is_adiak, component(), 0)
+    for field in HISTORY_FIELDS:
+        columns[field] = np.where(is_adiak, 0, component())
+    return ixtisas_ids, columns
+
+
+def write_roster_csv(path, ixtisas_ids, columns):
+    """Siyahını sample_students.csv formatında (UTF-8 BOM) yazır"""
+    fields = CSV_HEADERS[3:]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS)
+        for i, ixtisas_id in enumerate(ixtisas_ids.tolist()):
+            writer.writerow(
+                [ixtisas_id, NAMES[i % len(NAMES)], SURNAMES[i % len(SURNAMES)]]
+                + [int(columns[field][i]) for field in fields]
+            )
+
+
+def timed(results, name, size, func, rows=None):
+    """func-u bir dəfə icra edib vaxtını nəticələrə əlavə edir"""
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    rows = size if rows is None else rows
+    results.append({
+        "name": name,
+        "size": size,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 and rows else None,
+    })
+    print(f"{name:<40} n={size:<9} {seconds:10.4f}s", file=sys.stderr)
+    return value
+
+
+def reset_database():
+    db = scholarship_app.db
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    scholarship_app.migrate_schema()
+
+
+def bench_size(size, results):
+    app = scholarship_app.app
+    ixtisas_ids, columns = generate_roster(size)
+    csv_path = os.path.join(_db_dir, f"roster-{size}.csv")
+    write_roster_csv(csv_path, ixtisas_ids, columns)
+
+    def identify_columns():
+        for _ in range(1_000):
+            scholarship_app.identify_csv_columns(CSV_HEADERS)
+    timed(results, "identify_csv_columns x1000", size, identify_columns, rows=1_000)
+
+    # Skalyar və vektor hesablayıcılar
+    lists = {field: values.tolist() for field, values in columns.items()}
+    timed(results, "calculate_english_from_components", size, lambda: [
+        calculate_english_from_components(*row) for row in zip(*(lists[f] for f in ENGLISH_FIELDS))
+    ])
+    timed(results, "calculate_ict_from_components", size, lambda: [
+        calculate_ict_from_components(*row) for row in zip(*(lists[f] for f in ICT_FIELDS))
+    ])
+    timed(results, "calculate_adiak_from_components", size, lambda: [
+        calculate_adiak_from_components(*row) for row in zip(*(lists[f] for f in ADIAK_FIELDS))
+    ])
+    timed(results, "calculate_history_from_components", size, lambda: [
+        calculate_history_from_components(*row) for row in zip(*(lists[f] for f in HISTORY_FIELDS))
+    ])
+    scores = timed(results, "score_columns (batch)", size, lambda: score_columns(
+        ixtisas_ids, columns, scholarship_app.qrup_1_RI, scholarship_app.qrup_1_RK + scholarship_app.qrup_2
+    ))
+
+    with app.app_context():
+        # Student._calculate_grades_and_status - tranzient obyektlər üzərində
+        sample = min(size, ORM_SAMPLE_LIMIT)
+        students = [
+            scholarship_app.Student(
+                int(ixtisas_ids[i]), "n", "s",
+                scores["english_point"][i], scores["adiak_point"][i],
+                scores["ict_point"][i], scores["history_point"][i],
+            )
+            for i in range(sample)
+        ]
+        timed(results, "Student._calculate_grades_and_status", size,
+              lambda: [student._calculate_grades_and_status() for student in students], rows=sample)
+        del students
+
+        # upload_csv import dövrü (hissələrlə yazma + yekun sıralama daxil)
+        reset_database()
+
+        def import_file():
+            with open(csv_path, encoding="utf-8-sig", newline="") as stream:
+                reader = csv.reader(stream)
+                column_map = scholarship_app.identify_csv_columns(next(reader))
+                return scholarship_app.import_csv_rows(reader, column_map, progress=None)
+        timed(results, "upload_csv import loop", size, import_file)
+
+        db = scholarship_app.db
+
+        def regrade_all():
+            scholarship_app.apply_grades_sql()
+            db.session.commit()
+        timed(results, "apply_grades_sql (all rows)", size, regrade_all)
+        timed(results, "recompute_scores (components -> points, re-rank)", size,
+              lambda: scholarship_app.recompute_scores())
+
+        for engine_name, engine in scholarship_app.RANKING_ENGINES.items():
+            db.session.execute(db.update(scholarship_app.Student).values(rank=None, scholarship_type=None))
+            db.session.commit()
+
+            def rank_all():
+                engine()
+                db.session.commit()
+            timed(results, f"assign_scholarships ({engine_name})", size, rank_all)
+
+        scholarship_app.roster_changed()
+
+        def render_results():
+            scholarship_app._results_cache = (None, {})
+            scholarship_app._fragment_cache.clear()
+            with app.test_request_context("/calculate"):
+                return scholarship_app.render_results_page()
+        timed(results, "results.html render (first pages)", size, render_results)
+
+    os.remove(csv_path)
+
+
+# Yeni işçi prosesin başlanğıcı: import, create_app() və ilk /calculate sorğusu
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app as scholarship_app
+imported = time.perf_counter()
+app = scholarship_app.create_app(json.loads(sys.argv[1]))
+created = time.perf_counter()
+client = app.test_client()
+with client.session_transaction() as session:
+    session["username"] = "benchmark"
+client.get("/calculate")
+finished = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported,
+                  "first_request": finished - created, "total": finished - started}))
+"""
+
+
+def bench_startup(results):
+    """
+    İşçinin ilk sorğuya qədər vaxtı ayrıca proseslərdə ölçülür: boş və dolu
+    bayt-kod keşi ilə, həmçinin nəticə keşləri qızdırılaraq
+    """
+    cache_dir = os.path.join(_db_dir, "jinja_cache")
+    variants = [
+        ("cold bytecode cache", {}),
+        ("warm bytecode cache", {}),
+        ("warm bytecode cache + WARMUP_RESULTS", {"WARMUP_RESULTS": True}),
+        ("no bytecode cache, no warm-up", {"JINJA_BYTECODE_CACHE_DIR": "", "WARMUP_TEMPLATES": False}),
+    ]
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    for label, overrides in variants:
+        config = {"JINJA_BYTECODE_CACHE_DIR": cache_dir, **overrides}
+        output = subprocess.check_output(
+            [sys.executable, "-c", STARTUP_SCRIPT, json.dumps(config)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), text=True,
+        )
+        phases = json.loads(output.strip().splitlines()[-1])
+        for phase in ("import", "create_app", "first_request", "total"):
+            results.append({"name": f"startup {phase} ({label})", "size": None, "rows": None,
+                            "seconds": round(phases[phase], 6), "rows_per_second": None})
+        print(f"{'startup (' + label + ')':<40} {phases['total']:10.4f}s "
+              f"(first request {phases['first_request'] * 1000:.1f} ms)", file=sys.stderr)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Təqaüd proqramının isti yollarını ölçür")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="vergüllə ayrılmış sətir sayları (standart: 1000,100000,1000000)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON nəticə faylı")
+    args = parser.parse_args()
+
+    results = []
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            bench_size(size, results)
+        # Sonuncu ölçünün bazası üzərində
+        bench_startup(results)
+    finally:
+        with scholarship_app.app.app_context():
+            scholarship_app.db.engine.dispose()
+        shutil.rmtree(_db_dir, ignore_errors=True)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ranking_engine": scholarship_app.app.config["RANKING_ENGINE"],
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Nəticələr yazıldı: {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_english_grade():
     print("\n--- İngilis Dili üzrə Qiymətləndirmə ---")
     
@@ -34,4 +37,13 @@ def calculate_english_from_components(assessment, writing, p1, p2, p3, participa
     pres_avg = (p1 + p2 + p3) / 3
     pre_exam_total = (assessment * 0.20) + (writing * 0.10) + (pres_avg * 0.10) + (participation * 0.10)
     after_exam_total = midterm * 0.50
-    return pre_exam_total + after_exam_total
\ No newline at end of file
+    return pre_exam_total + after_exam_total
+
+
+def calculate_english_batch(assessment, writing, p1, p2, p3, participation, midterm):
+    """
+    Bütöv sütunlar (list və ya NumPy massivi) üzrə İngilis dili yekun balları.
+    Düstur calculate_english_from_components ilə eynidir.
+    """
+    columns = (assessment, writing, p1, p2, p3, participation, midterm)
+    return calculate_english_from_components(*(np.asarray(c, dtype=float) for c in columns))
@@ -0,0 +1,57 @@
+import csv
+import io
+import tempfile
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX ixracı üçün openpyxl isteğe bağlıdır
+    Workbook = None
+
+CSV_MIMETYPE = "text/csv"  # Flask charset=utf-8 əlavə edir
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Bir dəfəyə göndərilən CSV sətirlərinin sayı
+CSV_CHUNK_ROWS = 500
+# XLSX faylı göndərilərkən oxunan hissənin ölçüsü (bayt)
+XLSX_CHUNK_BYTES = 64 * 1024
+
+
+def xlsx_available():
+    return Workbook is not None
+
+
+def iter_csv(headers, rows, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Sətirləri UTF-8 BOM-lu CSV kimi hissə-hissə yield edir (fix_encoding.py
+    ilə eyni kodlaşdırma, Excel Azərbaycan hərflərini düz göstərir).
+    Yaddaşda ən çox chunk_rows sətir saxlanılır.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(headers, rows, sheet_title):
+    """
+    Sətirləri openpyxl-in write-only iş kitabına yazır və hazır faylı hissə-hissə
+    yield edir. XLSX zip arxividir, ona görə fayl əvvəlcə müvəqqəti diskdə
+    yığılır; write-only rejimdə sətirlər yaddaşda saxlanılmır.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        for chunk in iter(lambda: f.read(XLSX_CHUNK_BYTES), b""):
+            yield chunk
@@ -0,0 +1,56 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class GroupCommitter:
+    """
+    Paralel gələn kiçik yazıları qrup commit-lərinə yığır. Bir yazıçı axını
+    növbədən ilk elementi götürür, sonra max_wait saniyə və ya max_batch
+    elementə qədər gözləyib hamısını run_batch-a verir. run_batch hər element
+    üçün nəticə və ya Exception qaytarır; hər göndərən öz Future-unu alır.
+    run_batch özü xəta atsa, qrupdakı bütün elementlər həmin xətanı alır.
+    """
+
+    def __init__(self, run_batch, max_batch=32, max_wait=0.005, name="group-commit"):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+            try:
+                outcomes = self.run_batch([item for item, _ in batch])
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, outcome in zip(futures, outcomes):
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
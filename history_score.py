@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_history_grade():
     print("\n--- Tarix Fənni üzrə Qiymətləndirmə ---")
     
@@ -18,4 +21,12 @@ def calculate_history_from_components(seminar, interactive, presentation, midter
         + presentation * 0.05
         + midterm * 0.20
         + final * 0.60
-    )
\ No newline at end of file
+    )
+
+
+def calculate_history_batch(seminar, interactive, presentation, midterm, final):
+    """
+    Tarix ballarının vektorlaşdırılmış hesablanması - çəkilər yuxarıdakı kimi
+    """
+    columns = (seminar, interactive, presentation, midterm, final)
+    return calculate_history_from_components(*(np.asarray(c, dtype=float) for c in columns))
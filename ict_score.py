@@ -1,4 +1,5 @@
 # ict.py faylı
+import numpy as np
 
 
 def calculate_ict_grade():
@@ -30,4 +31,12 @@ def calculate_ict_from_components(quiz_raw, lab_raw, presentation_raw, exam_raw)
     lab_contribution = lab_raw * 0.20
     presentation_contribution = presentation_raw * 0.20
     exam_contribution = exam_raw * 0.40
-    return quiz_contribution + lab_contribution + presentation_contribution + exam_contribution
\ No newline at end of file
+    return quiz_contribution + lab_contribution + presentation_contribution + exam_contribution
+
+
+def calculate_ict_batch(quiz_raw, lab_raw, presentation_raw, exam_raw):
+    """
+    calculate_ict_from_components-in sütun variantı - bütün sətirlər bir dəfəyə
+    """
+    columns = (quiz_raw, lab_raw, presentation_raw, exam_raw)
+    return calculate_ict_from_components(*(np.asarray(c, dtype=float) for c in columns))
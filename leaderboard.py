@@ -0,0 +1,49 @@
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    """
+    Bir ixtisasın sıralama cədvəli (order-statistics): açarlar (-orta bal, id)
+    artan sırada saxlanılır, yəni assign_scholarships ilə eyni sıra - orta
+    bala görə azalan, bərabərlikdə id. Rank və n-ci yerin balı bisect ilə
+    O(log n), əlavə/silmə isə siyahıda sürüşdürmə ilə O(n) (memmove) olur.
+    Hər tələbə üçün əlavə məlumat (payload) saxlanıla bilər.
+    """
+
+    def __init__(self, entries=()):
+        self._entries = {student_id: ((-score, student_id), payload) for student_id, score, payload in entries}
+        self._keys = sorted(key for key, _ in self._entries.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, student_id):
+        return student_id in self._entries
+
+    def add(self, student_id, score, payload=None):
+        self.remove(student_id)
+        key = (-score, student_id)
+        self._entries[student_id] = (key, payload)
+        insort(self._keys, key)
+
+    def remove(self, student_id):
+        entry = self._entries.pop(student_id, None)
+        if entry is not None:
+            del self._keys[bisect_left(self._keys, entry[0])]
+
+    def rank(self, student_id):
+        """1-dən başlayan yer və ya None"""
+        entry = self._entries.get(student_id)
+        if entry is None:
+            return None
+        return bisect_left(self._keys, entry[0]) + 1
+
+    def score_at(self, rank):
+        """rank-cı yerdəki orta bal (yer yoxdursa None)"""
+        if not 1 <= rank <= len(self._keys):
+            return None
+        return -self._keys[rank - 1][0]
+
+    def payload(self, student_id):
+        entry = self._entries.get(student_id)
+        return entry[1] if entry is not None else None
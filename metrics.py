@@ -0,0 +1,177 @@
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Gecikmə histogramları üçün sərhədlər (saniyə)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Sorğu başına SQL sayı üçün sərhədlər
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+# Bu modulun import olunduğu an - işçi prosesin başlanğıcı kimi götürülür
+PROCESS_STARTED = time.perf_counter()
+
+
+class Histogram:
+    """Etiketlərə görə bölünmüş sadə Prometheus histogramı (thread-safe)"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            for key, series in items:
+                labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, key))
+                prefix = f"{labels}," if labels else ""
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines)
+
+
+class Metrics:
+    """
+    Marşrut gecikmələri, sorğu başına SQL sayı/vaxtı, təqaüd hesablama
+    vaxtı və başlanğıc mərhələləri (create_app, ilk sorğuya qədər vaxt).
+    Dəyərlər proses daxilindədir; /metrics Prometheus mətn formatında
+    qaytarır. SLOW_REQUEST_LOG_MS təyin olunubsa, ondan yavaş sorğular SQL
+    ifadələri ilə birlikdə loglanır.
+    """
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "scholarship_http_request_duration_seconds", "Marşrut üzrə sorğu müddəti",
+            ("endpoint", "method"), LATENCY_BUCKETS,
+        )
+        self.sql_queries = Histogram(
+            "scholarship_sql_queries_per_request", "Bir HTTP sorğusunda icra olunan SQL sayı",
+            ("endpoint",), QUERY_COUNT_BUCKETS,
+        )
+        self.sql_seconds = Histogram(
+            "scholarship_sql_duration_seconds_per_request", "Bir HTTP sorğusunda SQL-ə sərf olunan vaxt",
+            ("endpoint",), LATENCY_BUCKETS,
+        )
+        self.ranking_seconds = Histogram(
+            "scholarship_assign_scholarships_duration_seconds", "assign_scholarships() müddəti",
+            ("engine",), LATENCY_BUCKETS,
+        )
+        # Başlanğıc mərhələsi -> saniyə (gauge)
+        self.startup_seconds = {}
+        self._startup_lock = threading.Lock()
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault("SLOW_REQUEST_LOG_MS", None)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def observe_ranking(self, engine, seconds):
+        self.ranking_seconds.observe(seconds, engine=engine)
+
+    def observe_startup(self, phase, seconds):
+        with self._startup_lock:
+            self.startup_seconds[phase] = seconds
+
+    def render_startup(self):
+        name = "scholarship_startup_seconds"
+        lines = [f"# HELP {name} Proses başlanğıcından sonra mərhələlərin müddəti", f"# TYPE {name} gauge"]
+        with self._startup_lock:
+            for phase, seconds in sorted(self.startup_seconds.items()):
+                lines.append(f'{name}{{phase="{phase}"}} {seconds}')
+        return "\n".join(lines)
+
+    def render(self):
+        histograms = (self.request_seconds, self.sql_queries, self.sql_seconds, self.ranking_seconds)
+        return "\n".join([*(h.render() for h in histograms), self.render_startup()]) + "\n"
+
+    def metrics_view(self):
+        return self.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        g.sql_statements = [] if self.app.config["SLOW_REQUEST_LOG_MS"] is not None else None
+
+    def _after_request(self, response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        seconds = time.perf_counter() - start
+        if "first_request" not in self.startup_seconds:
+            self._observe_first_request(seconds)
+        endpoint = request.endpoint or "unknown"
+        self.request_seconds.observe(seconds, endpoint=endpoint, method=request.method)
+        self.sql_queries.observe(g.sql_count, endpoint=endpoint)
+        self.sql_seconds.observe(g.sql_seconds, endpoint=endpoint)
+
+        slow_ms = self.app.config["SLOW_REQUEST_LOG_MS"]
+        if slow_ms is not None and seconds * 1000 >= slow_ms:
+            statements = sorted(g.sql_statements or [], key=lambda item: item[0], reverse=True)
+            self.app.logger.warning(
+                "Yavaş sorğu: %s %s %.1f ms, %d SQL (%.1f ms)\n%s",
+                request.method, request.path, seconds * 1000, g.sql_count, g.sql_seconds * 1000,
+                "\n".join(f"  {duration * 1000:.1f} ms: {statement}" for duration, statement in statements[:10]),
+            )
+        return response
+
+    def _observe_first_request(self, seconds):
+        """Prosesin ilk cavabı: başlanğıcdan keçən vaxt və sorğunun öz müddəti"""
+        with self._startup_lock:
+            if "first_request" in self.startup_seconds:
+                return
+            since_start = time.perf_counter() - PROCESS_STARTED
+            self.startup_seconds["first_request"] = since_start
+            self.startup_seconds["first_request_duration"] = seconds
+        self.app.logger.info(
+            "İlk sorğu: %s %s, başlanğıcdan %.1f ms (sorğunun özü %.1f ms)",
+            request.method, request.path, since_start * 1000, seconds * 1000,
+        )
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context():
+            return
+        starts = conn.info.get("metrics_query_start")
+        if not starts or "sql_count" not in g:
+            return
+        duration = time.perf_counter() - starts.pop()
+        g.sql_count += 1
+        g.sql_seconds += duration
+        if g.sql_statements is not None:
+            g.sql_statements.append((duration, statement))
+
+
+metrics = Metrics()
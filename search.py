@@ -0,0 +1,77 @@
+import unicodedata
+
+# Ad/soyad axtarışı üçün FTS5 cədvəli: rowid = student.id, full_name tətbiqin Python-da
+# search_name() ilə yazdığı student.search_name sütunudur. Triggerlər onu sadəcə köçürür və
+# heç bir funksiya çağırmır, ona görə student-ə başqa klientlər də yaza bilir. Trigram
+# tokenizatoru alt sətir axtarışı verir; mətn artıq kiçildildiyi üçün case_sensitive 1 ilə
+# FTS5-in öz (İ/I bilməyən) çevirməsi söndürülür.
+SEARCH_TABLE = "student_search"
+
+# Trigram indeksi yalnız ən azı 3 simvolluq sözlərdə istifadə olunur
+MIN_INDEXED_TOKEN = 3
+
+SEARCH_TABLE_DDL = (
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    "full_name, term UNINDEXED, tokenize = 'trigram case_sensitive 1')"
+)
+
+_FULL_NAME = "coalesce({row}.search_name, '')"
+
+# student cədvəli ilə sinxronluq: əlavə, silmə və search_name/semestr dəyişikliyi
+SEARCH_TRIGGERS = {
+    "student_search_ai": f"""
+        CREATE TRIGGER student_search_ai AFTER INSERT ON student BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, full_name, term)
+            VALUES (new.id, {_FULL_NAME.format(row="new")}, new.term);
+        END""",
+    "student_search_ad": f"""
+        CREATE TRIGGER student_search_ad AFTER DELETE ON student BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        END""",
+    "student_search_au": f"""
+        CREATE TRIGGER student_search_au AFTER UPDATE OF search_name, term ON student BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+            INSERT INTO {SEARCH_TABLE}(rowid, full_name, term)
+            VALUES (new.id, {_FULL_NAME.format(row="new")}, new.term);
+        END""",
+}
+
+SEARCH_BACKFILL_SQL = (
+    f"INSERT INTO {SEARCH_TABLE}(rowid, full_name, term) "
+    f"SELECT id, {_FULL_NAME.format(row='student')}, term FROM student"
+)
+
+
+def az_fold(value):
+    """
+    Axtarışın və upsert açarlarının ortaq kiçildilməsi. İ, I, ı və i hamısı
+    i olur: ad həm Azərbaycan (İlham, Ismayılov), həm də latın klaviaturası
+    ilə (Ilham, Ismayilov) yazıla bilər və hər yazılış digərini tapmalıdır.
+    Qalan hərflər (Ə, Ş, Ç, Ğ, Ö, Ü) str.lower() ilə kiçildilir. Mətn əvvəlcə
+    NFC-yə salınır ki, birləşdirici işarəli yazılış eyni nəticə versin.
+    """
+    if value is None:
+        return None
+    value = unicodedata.normalize("NFC", value)
+    return value.replace("İ", "i").lower().replace("ı", "i")
+
+
+def search_name(name, surname):
+    """student.search_name dəyəri: az_fold() ilə kiçildilmiş ad və soyad (boşluqla)"""
+    return az_fold(f"{name or ''} {surname or ''}")
+
+
+def search_tokens(query):
+    """
+    Axtarış sətrini sözlərə bölür: (indekslənən sözlər, qısa sözlər).
+    Qısa sözlər (3 simvoldan az) tapılan sətirlərdə əlavə süzgəc kimi yoxlanılır.
+    """
+    tokens = az_fold(query or "").split()
+    indexed = [token for token in tokens if len(token) >= MIN_INDEXED_TOKEN]
+    short = [token for token in tokens if len(token) < MIN_INDEXED_TOKEN]
+    return indexed, short
+
+
+def match_expression(tokens):
+    """FTS5 MATCH ifadəsi: hər söz dırnaq içində (alt sətir), sözlər AND ilə"""
+    return " AND ".join('"' + token.replace('"', '""') + '"' for token in tokens)
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Təqaüd növünə görə sayılar üçün sabit sıra
+SCHOLARSHIP_TYPES = ["Əlaçı təqaüdü", "Zərbəçi", "Adi təqaüd"]
+
+# Uzunömürlü işçi pool-ları: proses sayı -> ProcessPoolExecutor. İşçilər fork
+# olunmur (forkserver, olmadıqda spawn), ona görə veb işçisinin thread-lərini və
+# baza bağlantılarını miras almır və yalnız bu modulu yükləyir.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def evaluate_quota_config(roster, config):
+    """
+    Bir kvota konfiqurasiyasını roster snapshot-u üzərində qiymətləndirir.
+
+    roster - {ixtisas_id: [(orta_bal, uyğun_təqaüd_növü), ...]} orta bala görə
+    azalan sırada. config - {"name": ..., "quotas": {ixtisas_id: free}}.
+    Heç nə bazaya yazılmır.
+    """
+    quotas = config["quotas"]
+    result = {}
+    for ixtisas_id, students in roster.items():
+        free = quotas.get(ixtisas_id, 0)
+        within_quota = students[:free]
+        awards = {scholarship_type: 0 for scholarship_type in SCHOLARSHIP_TYPES}
+        awarded_averages = []
+        for average_score, scholarship_type in within_quota:
+            if scholarship_type is not None:
+                awards[scholarship_type] += 1
+                awarded_averages.append(average_score)
+        result[ixtisas_id] = {
+            "free": free,
+            "students": len(students),
+            "awards": awards,
+            "total_awarded": len(awarded_averages),
+            # Kvotaya düşən sonuncu tələbənin orta balı
+            "cutoff_average": round(within_quota[-1][0], 2) if within_quota else None,
+            # Təqaüd alanlar arasında ən aşağı orta bal
+            "lowest_awarded_average": round(min(awarded_averages), 2) if awarded_averages else None,
+        }
+    return {"name": config.get("name"), "quotas": quotas, "ixtisas": result}
+
+
+def _evaluate_chunk(roster, configs):
+    return [evaluate_quota_config(roster, config) for config in configs]
+
+
+def get_pool(processes):
+    """processes işçili pool (ilk istifadədə yaradılır və sonrakı sorğularda işlənir)"""
+    with _pools_lock:
+        pool = _pools.get(processes)
+        if pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method))
+            _pools[processes] = pool
+        return pool
+
+
+def _discard_pool(processes, pool):
+    with _pools_lock:
+        if _pools.get(processes) is pool:
+            del _pools[processes]
+
+
+def simulate_quotas(roster, configs, processes=None):
+    """
+    Bir çox kvota konfiqurasiyasını qiymətləndirir. Standart olaraq hər şey bu
+    prosesdə gedir; processes > 1 açıq verildikdə (CPU sayı ilə məhdud)
+    konfiqurasiyalar uzunömürlü pool-un işçiləri arasında hissələrə bölünür
+    və roster hər hissə ilə bir dəfə ötürülür. Nəticələr konfiqurasiyaların sırası ilə
+    qaytarılır.
+    """
+    # Pool-ların sayı və ölçüsü CPU sayı ilə məhduddur
+    processes = min(processes or 1, os.cpu_count() or 1)
+    if processes == 1 or len(configs) <= 1:
+        return _evaluate_chunk(roster, configs)
+
+    size = -(-len(configs) // processes)
+    chunks = [configs[start:start + size] for start in range(0, len(configs), size)]
+    pool = get_pool(processes)
+    try:
+        futures = [pool.submit(_evaluate_chunk, roster, chunk) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+    except BrokenProcessPool:
+        # Ölən işçisi olan pool növbəti sorğuda yenidən yaradılır
+        _discard_pool(processes, pool)
+        raise
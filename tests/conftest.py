@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app modulu bazanı import zamanı bağlayır - testlər müvəqqəti SQLite faylı ilə işləyir
+_db_dir = tempfile.mkdtemp(prefix="scholarship-tests-")
+os.environ["FLASK_SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(_db_dir, "test.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as scholarship_app  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Hər test üçün boş cədvəllər və açıq app konteksti"""
+    with scholarship_app.app.app_context():
+        scholarship_app.db.drop_all()
+        scholarship_app.db.create_all()
+        yield scholarship_app.db
+        scholarship_app.db.session.remove()
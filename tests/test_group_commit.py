@@ -0,0 +1,126 @@
+"""
+Qrup commit: bir qrupa düşən uğurlu və xətalı yazılar. Hər sorğu öz
+nəticəsini alır, xətalı mutasiya yalnız özünü geri qaytarır, roster isə
+qrup üçün bir dəfə yenidən sıralanır.
+"""
+import threading
+
+import pytest
+
+import app as A
+from batch_scoring import COMPONENT_FIELDS
+
+ADIAK_IXTISAS = A.qrup_1_RI[0]
+HISTORY_IXTISAS = (A.qrup_1_RK + A.qrup_2)[0]
+
+
+def student_form(ixtisas_id, name, surname="S", score="70"):
+    form = {field: score for field in COMPONENT_FIELDS}
+    form.update(ixtisas_id=str(ixtisas_id), name=name, surname=surname)
+    return form
+
+
+def post_together(requests):
+    """Sorğuları ayrı axınlarda eyni anda göndərir, status kodlarını sıra ilə qaytarır"""
+    statuses = [None] * len(requests)
+
+    def send(index, url, data):
+        client = A.app.test_client()
+        with client.session_transaction() as session:
+            session["username"] = A.ADMIN_USERNAME
+        statuses[index] = client.post(url, data=data).status_code
+
+    threads = [threading.Thread(target=send, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return statuses
+
+
+@pytest.fixture
+def one_batch(db, monkeypatch):
+    """
+    Bütün sorğular bir qrupa düşsün deyə yeni yazıçı: qrup max_batch sorğu
+    yığılanda dərhal, ən gec 5 saniyəyə icra olunur. roster_changed
+    çağırışları qeydə alınır.
+    """
+    A.init_database()
+    monkeypatch.setitem(A.app.config, "WRITE_COALESCE", True)
+    monkeypatch.setitem(A.app.config, "WRITE_COALESCE_MS", 5000)
+    monkeypatch.setattr(A, "_write_coalescer", None)
+    calls = []
+    roster_changed = A.roster_changed
+
+    def counting_roster_changed(ixtisas_ids=None, student_ids=None):
+        calls.append((set(ixtisas_ids or ()), set(student_ids or ())))
+        return roster_changed(ixtisas_ids, student_ids)
+
+    monkeypatch.setattr(A, "roster_changed", counting_roster_changed)
+
+    def configure(size):
+        monkeypatch.setitem(A.app.config, "WRITE_COALESCE_MAX_BATCH", size)
+        calls.clear()
+        return calls
+
+    return configure
+
+
+def add_students(db, *rows):
+    students = [A.Student(ixtisas_id, name, "S", 70, 70, 70, 70) for ixtisas_id, name in rows]
+    db.session.add_all(students)
+    db.session.commit()
+    A.roster_changed()
+    ids = [student.id for student in students]
+    db.session.remove()
+    return ids
+
+
+def test_mixed_batch_gives_each_request_its_outcome(db, one_batch):
+    kept_id, removed_id = add_students(db, (ADIAK_IXTISAS, "Kept"), (HISTORY_IXTISAS, "Removed"))
+    version = A.get_roster_version()
+    db.session.remove()
+    requests = [
+        ("/add_student", student_form(ADIAK_IXTISAS, "Added")),
+        ("/remove_student/999999", {}),
+        ("/add_student", {"ixtisas_id": str(ADIAK_IXTISAS), "surname": "NoName"}),
+        # update_student bütün xətalarını, 404 daxil, 400 kimi qaytarır
+        ("/update_student/999999", student_form(ADIAK_IXTISAS, "Ghost")),
+        ("/update_student/%d" % kept_id, student_form(ADIAK_IXTISAS, "Edited", score="90")),
+        ("/remove_student/%d" % removed_id, {}),
+    ]
+    calls = one_batch(len(requests))
+
+    statuses = post_together(requests)
+
+    assert statuses == [302, 404, 400, 400, 302, 302]
+    assert len(calls) == 1
+    assert calls[0][0] == {ADIAK_IXTISAS, HISTORY_IXTISAS}
+    assert A.get_roster_version() == version + 1
+    names = set(db.session.execute(db.select(A.Student.name)).scalars())
+    assert names == {"Added", "Edited"}
+    # Silinən tələbənin komponentləri də getdi (id yenidən istifadə oluna bilər)
+    student_ids = set(db.session.execute(db.select(A.Student.id)).scalars())
+    assert set(db.session.execute(db.select(A.StudentComponents.student_id)).scalars()) == student_ids
+    published = db.session.execute(
+        db.select(A.ResultSnapshotRow.name).where(A.ResultSnapshotRow.snapshot_id.in_(
+            db.select(A.ResultSnapshot.id).where(A.ResultSnapshot.is_current)
+        ))
+    ).scalars()
+    assert set(published) == {"Added", "Edited"}
+
+
+def test_batch_of_failures_does_not_rerank(db, one_batch):
+    add_students(db, (ADIAK_IXTISAS, "Kept"))
+    version = A.get_roster_version()
+    db.session.remove()
+    requests = [
+        ("/remove_student/999999", {}),
+        ("/add_student", {"ixtisas_id": str(ADIAK_IXTISAS), "surname": "NoName"}),
+    ]
+    calls = one_batch(len(requests))
+
+    assert post_together(requests) == [404, 400]
+    assert calls == []
+    assert A.get_roster_version() == version
+    assert db.session.execute(db.select(db.func.count(A.Student.id))).scalar() == 1
@@ -0,0 +1,136 @@
+"""
+Eyni qaydanın iki realizasiyası arasında uyğunluq: SQL və Python hərf
+qiymətləri, vektor (score_columns) və skalyar bal hesablayıcıları, SQL və
+Python sıralama mühərrikləri.
+"""
+import itertools
+import random
+
+import pytest
+
+import app as A
+from adiak_score import calculate_adiak_from_components
+from batch_scoring import ADIAK_FIELDS, ENGLISH_FIELDS, HISTORY_FIELDS, ICT_FIELDS, COMPONENT_FIELDS, score_columns
+from english_score import calculate_english_from_components
+from history_score import calculate_history_from_components
+from ict_score import calculate_ict_from_components
+
+# Sərhədlər və onların arasındakı boşluqlar (69.5, 90.5, 100.5, 60.99 kimi kəsr ballar)
+BOUNDARY_SCORES = [
+    0, 39.5, 40, 49, 49.5, 50, 59, 59.5, 60, 60.99, 61, 69, 69.5, 70, 70.5,
+    71, 80.5, 80.99, 81, 90, 90.5, 90.99, 91, 99.5, 100, 100.5,
+]
+
+# ADIAK qrupu, Tarix qrupu və planda olmayan ixtisas
+IXTISAS_SAMPLES = [A.qrup_1_RI[0], (A.qrup_1_RK + A.qrup_2)[0], 123]
+
+
+@pytest.mark.parametrize("score", BOUNDARY_SCORES)
+def test_grade_sql_matches_python(db, score):
+    english, other = db.session.execute(
+        db.select(A.english_grade_sql(db.literal(score)), A.other_grade_sql(db.literal(score)))
+    ).one()
+    assert english == A.Student._grade_english(score)
+    assert other == A.Student._grade_other(score)
+
+
+def test_apply_grades_sql_matches_calculate_grades_and_status(db):
+    students = [
+        A.Student(ixtisas_id, "n", "s", english, third, ict, third)
+        for ixtisas_id in IXTISAS_SAMPLES
+        for english, ict, third in itertools.product(BOUNDARY_SCORES[::2], BOUNDARY_SCORES[1::2], BOUNDARY_SCORES[::3])
+    ]
+    db.session.add_all(students)
+    db.session.commit()
+    expected = {
+        s.id: (s.english_grade, s.ict_grade, s.adiak_grade, s.history_grade, bool(s.cancelled)) for s in students
+    }
+
+    db.session.execute(db.update(A.Student).values(
+        english_grade=None, ict_grade=None, adiak_grade=None, history_grade=None, cancelled=None,
+    ))
+    A.apply_grades_sql()
+    db.session.commit()
+    rows = db.session.execute(db.select(
+        A.Student.id, A.Student.english_grade, A.Student.ict_grade,
+        A.Student.adiak_grade, A.Student.history_grade, A.Student.cancelled,
+    )).all()
+    assert {row.id: tuple(row[1:]) for row in rows} == expected
+
+
+def scalar_student(ixtisas_id, values):
+    """Skalyar hesablayıcılarla (forma yolu) qurulan tələbə"""
+    english = calculate_english_from_components(*(values[f] for f in ENGLISH_FIELDS))
+    ict = calculate_ict_from_components(*(values[f] for f in ICT_FIELDS))
+    adiak = history = 0
+    if ixtisas_id in A.qrup_1_RI:
+        adiak = calculate_adiak_from_components(*(values[f] for f in ADIAK_FIELDS))
+    elif ixtisas_id in A.qrup_1_RK or ixtisas_id in A.qrup_2:
+        history = calculate_history_from_components(*(values[f] for f in HISTORY_FIELDS))
+    return A.Student(ixtisas_id, "n", "s", english, adiak, ict, history)
+
+
+def test_score_columns_match_scalar_scorers():
+    rng = random.Random(17)
+    ixtisas_ids = [rng.choice(list(A.IXTISAS_PLANS) + [123]) for _ in range(3000)]
+    components = {
+        field: [rng.choice([rng.uniform(0, 100), float(rng.randint(0, 100)), *BOUNDARY_SCORES]) for _ in ixtisas_ids]
+        for field in COMPONENT_FIELDS
+    }
+    columns = {key: values.tolist() for key, values in
+               score_columns(ixtisas_ids, components, A.qrup_1_RI, A.qrup_1_RK + A.qrup_2).items()}
+
+    for i, ixtisas_id in enumerate(ixtisas_ids):
+        student = scalar_student(ixtisas_id, {field: components[field][i] for field in COMPONENT_FIELDS})
+        for key in ("english_point", "ict_point", "adiak_point", "history_point", "average_score"):
+            assert columns[key][i] == pytest.approx(getattr(student, key), abs=1e-9), (i, key)
+        for key in ("english_grade", "ict_grade", "adiak_grade", "history_grade"):
+            assert columns[key][i] == getattr(student, key), (i, key)
+        assert bool(columns["cancelled"][i]) == bool(student.cancelled), i
+
+
+def ranking(db):
+    return db.session.execute(
+        db.select(A.Student.id, A.Student.rank, A.Student.scholarship_type).order_by(A.Student.id)
+    ).all()
+
+
+def reset_ranking(db):
+    db.session.execute(db.update(A.Student).values(rank=None, scholarship_type=None))
+    db.session.commit()
+
+
+def test_ranking_engines_agree(db):
+    rng = random.Random(5)
+    ixtisas_ids = [rng.choice(list(A.IXTISAS_PLANS) + [123]) for _ in range(4000)]
+    # Tam ədəd komponentlər - orta balda bərabərliklər id sırası ilə həll olunur
+    components = {field: [rng.choice([rng.randint(55, 100), 95, 100]) for _ in ixtisas_ids] for field in COMPONENT_FIELDS}
+    A.insert_student_chunk(ixtisas_ids, ["n"] * len(ixtisas_ids), ["s"] * len(ixtisas_ids), components)
+    db.session.commit()
+
+    A.assign_scholarships()
+    db.session.commit()
+    python_ranking = ranking(db)
+    assert any(row.scholarship_type for row in python_ranking)
+
+    reset_ranking(db)
+    A.assign_scholarships_sql()
+    db.session.commit()
+    assert ranking(db) == python_ranking
+
+    # Yalnız bir ixtisasın yenidən sıralanması da eyni nəticə verir
+    subset = {A.qrup_1_RI[0]}
+    student_ids = db.session.execute(
+        db.select(A.Student.id).where(A.Student.ixtisas_id.in_(subset))
+    ).scalars().all()
+    db.session.execute(db.update(A.Student), [
+        {"id": student_id, "average_score": rng.uniform(60, 100)} for student_id in student_ids
+    ])
+    db.session.commit()
+    assert A.assign_scholarships(subset) > 0
+    db.session.commit()
+    python_ranking = ranking(db)
+    reset_ranking(db)
+    A.assign_scholarships_sql()
+    db.session.commit()
+    assert ranking(db) == python_ranking
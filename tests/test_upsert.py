@@ -0,0 +1,85 @@
+"""
+Upsert importu: eyni fayl heç nə dəyişmir, düzəldilmiş dəyər yalnız öz
+sətrini və ixtisasını yeniləyir, ad/soyad açarı İ/I/ı/i fərqinə həssas deyil.
+"""
+import csv
+import io
+
+import pytest
+
+import app as A
+from batch_scoring import COMPONENT_FIELDS
+
+ADIAK_IXTISAS = A.qrup_1_RI[0]
+HISTORY_IXTISAS = (A.qrup_1_RK + A.qrup_2)[0]
+COLUMN_MAP = {"ixtisas_id": 0, "name": 1, "surname": 2, **{field: 3 + i for i, field in enumerate(COMPONENT_FIELDS)}}
+
+
+def csv_row(ixtisas_id, name, surname, score=70):
+    return [str(ixtisas_id), name, surname] + [str(score)] * len(COMPONENT_FIELDS)
+
+
+def import_rows(rows, upsert=True):
+    text = "\n".join(",".join(row) for row in rows)
+    return A.import_csv_rows(csv.reader(io.StringIO(text)), COLUMN_MAP, progress=None, upsert=upsert)
+
+
+def published_snapshots():
+    return {ixtisas_id: snapshot.id for ixtisas_id, snapshot in A.get_current_snapshots().items()}
+
+
+@pytest.fixture
+def roster(db):
+    """İki ixtisasda append ilə yüklənmiş ilkin siyahı"""
+    A.init_database()
+    rows = [
+        csv_row(ADIAK_IXTISAS, "Aysel", "Məmmədova", 80),
+        csv_row(ADIAK_IXTISAS, "Orxan", "Əliyev", 75),
+        csv_row(HISTORY_IXTISAS, "Nigar", "Həsənova", 90),
+        csv_row(HISTORY_IXTISAS, "Elvin", "Quliyev", 65),
+    ]
+    import_rows(rows, upsert=False)
+    return rows
+
+
+def test_same_file_changes_nothing(db, roster):
+    snapshots = published_snapshots()
+    version = A.get_roster_version()
+
+    stats = import_rows(roster)
+
+    assert (stats["inserted"], stats["updated"], stats["skipped"]) == (0, 0, len(roster))
+    assert published_snapshots() == snapshots
+    assert A.get_roster_version() == version
+
+
+def test_corrected_value_updates_one_row_and_its_ixtisas(db, roster):
+    snapshots = published_snapshots()
+    corrected = [list(row) for row in roster]
+    corrected[3][3 + COMPONENT_FIELDS.index("eng_midterm")] = "100"
+
+    stats = import_rows(corrected)
+
+    assert (stats["inserted"], stats["updated"], stats["skipped"]) == (0, 1, len(roster) - 1)
+    after = published_snapshots()
+    assert after[ADIAK_IXTISAS] == snapshots[ADIAK_IXTISAS]
+    assert after[HISTORY_IXTISAS] != snapshots[HISTORY_IXTISAS]
+    elvin = db.session.execute(db.select(A.Student).where(A.Student.name == "Elvin")).scalar_one()
+    assert db.session.get(A.StudentComponents, elvin.id).eng_midterm == 100
+    published = db.session.execute(
+        db.select(A.ResultSnapshotRow.english_point)
+        .where(A.ResultSnapshotRow.snapshot_id == after[HISTORY_IXTISAS], A.ResultSnapshotRow.student_id == elvin.id)
+    ).scalar_one()
+    assert published == elvin.english_point
+
+
+def test_dotted_and_dotless_i_match_the_same_row(db):
+    A.init_database()
+    import_rows([csv_row(ADIAK_IXTISAS, "İlkin", "İsmayılov", 70)], upsert=False)
+
+    stats = import_rows([csv_row(ADIAK_IXTISAS, "Ilkin", "Ismayilov", 85)])
+
+    assert (stats["inserted"], stats["updated"]) == (0, 1)
+    students = db.session.execute(db.select(A.Student)).scalars().all()
+    assert len(students) == 1
+    assert students[0].english_point == A.component_points(ADIAK_IXTISAS, dict.fromkeys(COMPONENT_FIELDS, 85))["english_point"]